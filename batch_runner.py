@@ -0,0 +1,306 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import struct
+import sys
+import time
+
+from memory_accounting import MemoryAccountant
+from playback_history import PlaybackHistory
+from playlist_engine import PlaylistEngine
+from playlist_summary import PlaylistSummary
+from rating_bst import RatingBST
+from recency_filter import RecentlyPlayedSet
+from song import Song
+from state_store import load_state, save_state
+from system_snapshot import SystemSnapshot
+
+# Menu numbers accepted in place of command names, so traces can mirror the interactive menu
+MENU_CHOICES = {
+    "1": "add", "2": "play", "3": "undo", "4": "show", "5": "exit", "6": "search_id",
+    "7": "search_title", "8": "pin", "9": "unpin", "10": "shuffle", "11": "sort",
+    "12": "rate", "13": "by_rating", "14": "snapshot", "15": "summary", "16": "memory",
+}
+
+
+class BatchSession:
+    """
+    Runs menu-equivalent commands against one PlayWise state without prompts.
+    Every command is a dictionary such as {"op": "add", "title": ..., "artist": ..., "duration": 180};
+    handlers print the same messages as the interactive menu and return False on failure.
+    """
+
+    def __init__(self, playlist=None, history=None, rating_tree=None, song_id_counter=1):
+        self.playlist = playlist if playlist is not None else PlaylistEngine()
+        self.history = history if history is not None else PlaybackHistory()
+        self.rating_tree = rating_tree if rating_tree is not None else RatingBST()
+        self.song_id_counter = song_id_counter
+        # Same recency filter as the interactive menu, so "shuffle" behaves like option 10
+        if self.history.recency_filter is None:
+            self.history.recency_filter = RecentlyPlayedSet()
+        self.snapshot_module = SystemSnapshot(self.playlist, self.history, self.rating_tree)
+        self.summary_module = PlaylistSummary(self.playlist)
+        self.memory_module = MemoryAccountant(self.playlist, self.history, self.rating_tree)
+        self.finished = False  # Set by the "exit" command
+
+    def execute(self, command):
+        """
+        Run one command. Raises KeyError, TypeError or ValueError for malformed commands.
+        """
+        op = str(command["op"])
+        handler = getattr(self, "cmd_" + MENU_CHOICES.get(op, op), None)
+        if handler is None:
+            raise ValueError(f"unknown op '{op}'")
+        return handler(command)
+
+    def _walk(self):
+        """
+        Yield (index, song) in display order, respecting the reversed flag like _get_node.
+        """
+        playlist = self.playlist
+        current = playlist.tail if playlist.reversed else playlist.head
+        index = 0
+        while current:
+            yield index, current.song
+            current = current.prev if playlist.reversed else current.next
+            index += 1
+
+    def _find(self, song_id):
+        """
+        Return (index, song) of the first song with this ID in display order, walking the playlist once.
+        """
+        for index, song in self._walk():
+            if song.song_id == song_id:
+                return index, song
+        return None, None
+
+    @staticmethod
+    def _rating(value):
+        rating = int(value)
+        if rating < 1 or rating > 5:
+            raise ValueError("rating must be between 1 and 5")
+        return rating
+
+    def cmd_add(self, command):
+        song_id = int(command.get("song_id", self.song_id_counter))
+        song = Song(song_id, str(command["title"]), str(command["artist"]),
+                    int(command["duration"]), command.get("genre"))
+        rating = command.get("rating")
+        if rating is not None:
+            rating = self._rating(rating)  # Checked before the song is added
+        self.playlist.add_song(song)
+        self.rating_tree.insert_song(song, rating)
+        print(f"Added '{song.title}' by {song.artist} to playlist with ID {song_id}.")
+        self.song_id_counter = max(self.song_id_counter, song_id + 1)
+        return True
+
+    def cmd_play(self, command):
+        if self.playlist.size == 0:
+            print("Playlist is empty. Add songs first.")
+            return False
+        node = self.playlist._get_node(int(command["index"]))
+        if not node:
+            print("Invalid song index.")
+            return False
+        self.history.push_song(node.song)
+        print(f"Played: {node.song}")
+        return True
+
+    def cmd_undo(self, command):
+        song = self.history.undo_last_play()
+        if not song:
+            return False
+        self.playlist.add_song(song)
+        print(f"Re-added last played song: {song}")
+        return True
+
+    def cmd_show(self, command):
+        self.playlist.print_playlist()
+        return True
+
+    def cmd_exit(self, command):
+        self.finished = True
+        return True
+
+    def cmd_search_id(self, command):
+        index, song = self._find(int(command["song_id"]))
+        if song is None:
+            print("No song found with that ID.")
+            return False
+        print(f"Found song at index {index}: {song}")
+        return True
+
+    def cmd_search_title(self, command):
+        search_title = str(command["title"]).lower()
+        found = False
+        for index, song in self._walk():
+            if song.title.lower() == search_title:
+                print(f"Found song at index {index}: {song}")
+                found = True
+        if not found:
+            print("No song found with that title.")
+        return found
+
+    def cmd_pin(self, command):
+        if self.playlist.size == 0:
+            print("Playlist empty, add songs first.")
+            return False
+        if not self.playlist.pin_song(int(command["song_id"]), int(command["index"])):
+            print("Pinning failed.")
+            return False
+        return True
+
+    def cmd_unpin(self, command):
+        if not self.playlist.unpin_song(int(command["song_id"])):
+            print("Unpinning failed.")
+            return False
+        return True
+
+    def cmd_shuffle(self, command):
+        recent_mode = command.get("recent_mode", "demote")
+        if recent_mode not in ("demote", "exclude"):
+            raise ValueError(f"unknown recent_mode '{recent_mode}'")
+        play_order = self.playlist.shuffle_playlist_with_pins(self.history.recency_filter, recent_mode)
+        if recent_mode == "exclude":  # The playlist is unchanged; report the play order instead
+            print("Play order:")
+            for index, song in enumerate(play_order):
+                print(f"{index}: {song}")
+        return True
+
+    def cmd_sort(self, command):
+        criteria = command.get("criteria", "title")
+        if criteria not in ("title", "duration", "recent"):
+            raise ValueError(f"unknown sort criteria '{criteria}'")
+        self.playlist.sort_playlist(criteria, bool(command.get("ascending", True)))
+        print("Playlist sorted.")
+        return True
+
+    def cmd_rate(self, command):
+        song_id = int(command["song_id"])
+        rating = self._rating(command["rating"])
+        if self.playlist.size == 0:
+            print("Playlist empty, add songs first.")
+            return False
+        self.rating_tree.delete_song(song_id)
+        _, song = self._find(song_id)
+        if song is None:
+            print("Song not found in playlist.")
+            return False
+        self.rating_tree.insert_song(song, rating)
+        print(f"Rated song '{song.title}' with {rating} stars.")
+        return True
+
+    def cmd_by_rating(self, command):
+        rating = int(command["rating"])
+        songs = self.rating_tree.search_by_rating(rating)
+        if not songs:
+            print(f"No songs found with rating {rating}.")
+            return True
+        print(f"Songs with rating {rating}:")
+        for song in songs:
+            print(f"- {song}")
+        return True
+
+    def cmd_snapshot(self, command):
+        print(json.dumps(self.snapshot_module.export_delta(command.get("since"))))
+        return True
+
+    def cmd_summary(self, command):
+        self.summary_module.print_summary()
+        return True
+
+    def cmd_memory(self, command):
+        self.memory_module.print_report(command.get("sample_every"))
+        return True
+
+
+def run_batch(lines, session=None, out=None, flush_every=1000):
+    """
+    Execute a stream of JSON-line commands. Blank lines and lines starting with '#'
+    are skipped. Everything the commands print is collected in memory and written
+    to 'out' every flush_every commands (out=None discards it).
+
+    Returns:
+        dict: {'commands', 'failed', 'errors', 'elapsed_sec', 'commands_per_second', 'by_op'}
+    """
+    session = session if session is not None else BatchSession()
+    buffer = io.StringIO()
+    commands = failed = 0
+    errors = []  # First problems found, as "line N: message"
+    by_op = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(buffer):
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            commands += 1
+            try:
+                command = json.loads(line)
+                op = MENU_CHOICES.get(str(command["op"]), str(command["op"]))
+                by_op[op] = by_op.get(op, 0) + 1
+                ok = session.execute(command)
+            except (ValueError, KeyError, TypeError) as e:
+                ok = False
+                if len(errors) < 100:
+                    errors.append(f"line {line_no}: {e!r}")
+            if not ok:
+                failed += 1
+            if commands % flush_every == 0:
+                if out is not None:
+                    out.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+            if session.finished:
+                break
+    if out is not None:
+        out.write(buffer.getvalue())
+    elapsed = time.perf_counter() - start
+    return {'commands': commands, 'failed': failed, 'errors': errors, 'elapsed_sec': elapsed,
+            'commands_per_second': commands / elapsed if elapsed else 0.0, 'by_op': by_op}
+
+
+def main(argv=None):
+    """
+    Command line entry point, also reached through main.py, e.g.
+    python main.py --batch trace.jsonl --state playwise_state.bin
+    cat trace.jsonl | python main.py --batch - --quiet
+    """
+    parser = argparse.ArgumentParser(description="Run PlayWise menu commands from a JSON-lines file.")
+    parser.add_argument("--batch", required=True, help="Command file, or - for stdin")
+    parser.add_argument("--state", default=None, help="State file to restore before and save after the run")
+    parser.add_argument("--quiet", action="store_true", help="Discard command output")
+    parser.add_argument("--flush-every", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    session = BatchSession()
+    if args.state and os.path.exists(args.state):
+        try:
+            with load_state(args.state) as state:
+                playlist, history, rating_tree, lookup = state.restore()
+        except (OSError, ValueError, IndexError, struct.error) as e:
+            # Refuse to run: saving at the end would overwrite the unreadable file
+            print(f"ERROR could not restore {args.state}: {e}", file=sys.stderr)
+            return 1
+        session = BatchSession(playlist, history, rating_tree, max(lookup.id_map, default=0) + 1)
+
+    out = None if args.quiet else sys.stdout
+    if args.batch == "-":
+        report = run_batch(sys.stdin, session, out, args.flush_every)
+    else:
+        with open(args.batch, encoding="utf-8") as f:
+            report = run_batch(f, session, out, args.flush_every)
+
+    if args.state:
+        try:
+            save_state(args.state, session.playlist, session.history, session.rating_tree)
+        except (OSError, struct.error) as e:
+            report['errors'].append(f"could not save state to {args.state}: {e}")
+
+    for error in report['errors']:
+        print(f"ERROR {error}", file=sys.stderr)
+    print(f"Ran {report['commands']} command(s) in {report['elapsed_sec']:.3f} s "
+          f"({report['commands_per_second']:.0f} commands/s), {report['failed']} failed", file=sys.stderr)
+    return 1 if report['errors'] else 0
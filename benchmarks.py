@@ -0,0 +1,341 @@
+import argparse
+import contextlib
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from external_sort import ExternalSorter
+from playback_history import PlaybackHistory
+from playlist_engine import PlaylistEngine
+from rating_bst import RatingBST
+from snapshot_module import SnapshotModule
+from song import Song
+from song_lookup import SongLookup
+from song_rating_tree import SongRatingBST
+from system_snapshot import SystemSnapshot
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+PROBES = 100  # Operations timed for the per-call O(n) benchmarks (delete, move, _get_node, ...)
+EXTERNAL_SORT_BUDGET = 4 * 1024 * 1024  # Memory budget given to ExternalSorter in its benchmark
+
+# Peak-memory ceilings checked on every suite run: from min_n songs up, the tracemalloc
+# peak of the first benchmark must stay below 'fraction' times the peak of the second.
+# External sort exists to use less memory than the in-memory sort; this keeps it that way.
+PEAK_LIMITS = {
+    "external_sort.sort_playlist.title": ("playlist.sort_playlist.title", 0.5, 100000),
+}
+
+
+def make_catalog(n, seed=0):
+    """
+    Synthetic catalog of n songs with repeated titles, artists and genres.
+    """
+    rng = random.Random(seed)
+    genres = ["Pop", "Rock", "Jazz", "Hip-Hop", "Classical", None]
+    return [Song(i, f"Song {rng.randrange(n)}", f"Artist {rng.randrange(max(1, n // 20))}",
+                 rng.randint(60, 600), rng.choice(genres)) for i in range(n)]
+
+
+def _playlist(songs):
+    playlist = PlaylistEngine()
+    for song in songs:
+        playlist.add_song(song)
+    return playlist
+
+
+def _rated(songs):
+    tree = RatingBST()
+    for song in songs:
+        tree.insert_song(song, song.song_id % 5 + 1)
+    return tree
+
+
+def _song_rated(songs):
+    tree = SongRatingBST()
+    for song in songs:
+        tree.insert_song(song, song.song_id % 5 + 1)
+    return tree
+
+
+def _lookup(songs):
+    lookup = SongLookup()
+    for song in songs:
+        lookup.add_song(song)
+    return lookup
+
+
+def _history(songs):
+    history = PlaybackHistory()
+    for song in songs:
+        history.push_song(song)
+    return history
+
+
+def _external_sort_state(songs):
+    return _playlist(songs), _lookup(songs)
+
+
+def _snapshot_state(songs):
+    return _playlist(songs), _history(songs[:1000]), _rated(songs)
+
+
+# Each benchmark: name -> (setup(songs, rng) -> context, run(context, rng), ops(n) -> operations per run)
+BENCHMARKS = {
+    "playlist.add_song": (lambda songs, rng: songs,
+                          lambda songs, rng: _playlist(songs),
+                          lambda n: n),
+    "playlist.delete_song": (lambda songs, rng: _playlist(songs),
+                             lambda pl, rng: [pl.delete_song(rng.randrange(pl.size)) for _ in range(PROBES)],
+                             lambda n: PROBES),
+    "playlist.move_song": (lambda songs, rng: _playlist(songs),
+                           lambda pl, rng: [pl.move_song(rng.randrange(pl.size), rng.randrange(pl.size))
+                                            for _ in range(PROBES)],
+                           lambda n: PROBES),
+    "playlist._get_node": (lambda songs, rng: _playlist(songs),
+                           lambda pl, rng: [pl._get_node(rng.randrange(pl.size)) for _ in range(PROBES)],
+                           lambda n: PROBES),
+    "playlist.sort_playlist.title": (lambda songs, rng: _playlist(songs),
+                                     lambda pl, rng: pl.sort_playlist("title"),
+                                     lambda n: 1),
+    "playlist.sort_playlist.duration": (lambda songs, rng: _playlist(songs),
+                                        lambda pl, rng: pl.sort_playlist("duration"),
+                                        lambda n: 1),
+    "playlist.sort_playlist.recent": (lambda songs, rng: _playlist(songs),
+                                      lambda pl, rng: pl.sort_playlist("recent", ascending=False),
+                                      lambda n: 1),
+    "external_sort.sort_playlist.title": (lambda songs, rng: _external_sort_state(songs),
+                                          lambda ctx, rng: ExternalSorter(EXTERNAL_SORT_BUDGET).sort_playlist(
+                                              ctx[0], "title", lookup=ctx[1]),
+                                          lambda n: 1),
+    "playlist.shuffle_playlist_with_pins": (lambda songs, rng: _playlist(songs),
+                                            lambda pl, rng: pl.shuffle_playlist_with_pins(),
+                                            lambda n: 1),
+    "rating_bst.insert_song": (lambda songs, rng: songs,
+                               lambda songs, rng: _rated(songs),
+                               lambda n: n),
+    "rating_bst.search_by_rating": (lambda songs, rng: _rated(songs),
+                                    lambda tree, rng: [tree.search_by_rating(rng.randint(1, 5))
+                                                       for _ in range(PROBES)],
+                                    lambda n: PROBES),
+    "rating_bst.delete_song": (lambda songs, rng: (_rated(songs), len(songs)),
+                               lambda ctx, rng: [ctx[0].delete_song(rng.randrange(ctx[1])) for _ in range(PROBES)],
+                               lambda n: PROBES),
+    "song_rating_bst.insert_song": (lambda songs, rng: songs,
+                                    lambda songs, rng: _song_rated(songs),
+                                    lambda n: n),
+    "song_rating_bst.search_by_rating": (lambda songs, rng: _song_rated(songs),
+                                         lambda tree, rng: [tree.search_by_rating(rng.randint(1, 5))
+                                                            for _ in range(PROBES)],
+                                         lambda n: PROBES),
+    "song_rating_bst.delete_song": (lambda songs, rng: (_song_rated(songs), len(songs)),
+                                    lambda ctx, rng: [ctx[0].delete_song(rng.randrange(ctx[1]))
+                                                      for _ in range(PROBES)],
+                                    lambda n: PROBES),
+    "song_lookup.add_song": (lambda songs, rng: songs,
+                             lambda songs, rng: _lookup(songs),
+                             lambda n: n),
+    "song_lookup.search_by_id": (lambda songs, rng: (_lookup(songs), len(songs)),
+                                 lambda ctx, rng: [ctx[0].search_by_id(rng.randrange(ctx[1])) for _ in range(PROBES)],
+                                 lambda n: PROBES),
+    "song_lookup.search_by_title": (lambda songs, rng: (_lookup(songs), len(songs)),
+                                    lambda ctx, rng: [ctx[0].search_by_title(f"song {rng.randrange(ctx[1])}")
+                                                      for _ in range(PROBES)],
+                                    lambda n: PROBES),
+    "playback_history.push_song": (lambda songs, rng: songs,
+                                   lambda songs, rng: _history(songs),
+                                   lambda n: n),
+    "playback_history.undo_last_play": (lambda songs, rng: _history(songs),
+                                        lambda history, rng: [history.undo_last_play() for _ in range(PROBES)],
+                                        lambda n: PROBES),
+    "system_snapshot.export_snapshot": (lambda songs, rng: SystemSnapshot(*_snapshot_state(songs)),
+                                        lambda snap, rng: snap.export_snapshot(),
+                                        lambda n: 1),
+    "snapshot_module.export_snapshot": (lambda songs, rng: SnapshotModule(*_snapshot_state(songs)),
+                                        lambda snap, rng: snap.export_snapshot(),
+                                        lambda n: 1),
+}
+
+
+def run_benchmark(name, n, repeat=3, measure_memory=True, seed=0):
+    """
+    Time one benchmark at catalog size n.
+
+    Returns:
+        dict: {'n', 'ops', 'best_sec', 'per_op_sec', 'peak_bytes'}
+              peak_bytes is the tracemalloc peak of one extra run (None when disabled).
+    """
+    setup, run, ops = BENCHMARKS[name]
+    songs = make_catalog(n, seed)
+    timings = []
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        for attempt in range(repeat):
+            rng = random.Random(seed + attempt)
+            context = setup(songs, rng)
+            gc.collect()
+            start = time.perf_counter()
+            run(context, rng)
+            timings.append(time.perf_counter() - start)
+
+        peak = None
+        if measure_memory:
+            rng = random.Random(seed)
+            context = setup(songs, rng)
+            gc.collect()
+            tracemalloc.start()
+            run(context, rng)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    best = min(timings)
+    count = ops(n)
+    return {'n': n, 'ops': count, 'best_sec': best, 'per_op_sec': best / count, 'peak_bytes': peak}
+
+
+def scaling_exponent(points):
+    """
+    Least-squares slope of log(per-op time) against log(n).
+    Roughly 0 for O(1) per operation, 1 for O(n), a little above 0 for O(log n).
+    Whole-playlist operations (sort, shuffle, snapshots) count as one operation
+    per call, so O(n log n) shows up as slightly above 1.
+    """
+    xs = [math.log(p['n']) for p in points if p['per_op_sec'] > 0]
+    ys = [math.log(p['per_op_sec']) for p in points if p['per_op_sec'] > 0]
+    if len(xs) < 2:
+        return None
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if denominator == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def run_suite(sizes, names=None, repeat=3, measure_memory=True, progress=None):
+    """
+    Run every selected benchmark at every size.
+
+    Returns:
+        dict: {'meta': {...}, 'results': {name: {'points': [...], 'exponent': float}}}
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        points = []
+        for n in sizes:
+            points.append(run_benchmark(name, n, repeat, measure_memory))
+            if progress:
+                progress(name, points[-1])
+        results[name] = {'points': points, 'exponent': scaling_exponent(points)}
+    meta = {'python': platform.python_version(), 'platform': platform.platform(),
+            'sizes': list(sizes), 'repeat': repeat, 'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {'meta': meta, 'results': results}
+
+
+def check_peaks(suite, limits=PEAK_LIMITS):
+    """
+    Check the PEAK_LIMITS ceilings within one suite result. Pairs that were not
+    both run (or were run without memory measurement) are skipped.
+
+    Returns:
+        list: Human-readable violations (empty when none).
+    """
+    violations = []
+    results = suite['results']
+    for name, (reference, fraction, min_n) in limits.items():
+        if name not in results or reference not in results:
+            continue
+        reference_points = {p['n']: p for p in results[reference]['points']}
+        for point in results[name]['points']:
+            other = reference_points.get(point['n'])
+            if point['n'] < min_n or other is None or point['peak_bytes'] is None or other['peak_bytes'] is None:
+                continue
+            if point['peak_bytes'] > fraction * other['peak_bytes']:
+                violations.append(f"{name} @ n={point['n']}: peak {point['peak_bytes'] / 1e6:.1f} MB "
+                                  f"exceeds {fraction:g} x {reference} ({other['peak_bytes'] / 1e6:.1f} MB)")
+    return violations
+
+
+def compare(baseline, current, threshold=1.25, exponent_slack=0.3):
+    """
+    Compare two suite results. A regression is a per-op time more than 'threshold'
+    times slower at the same size, or a scaling exponent grown by more than 'exponent_slack'.
+
+    Returns:
+        list: Human-readable regression descriptions (empty when none).
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if old is None:
+            continue
+        old_points = {p['n']: p for p in old['points']}
+        for point in result['points']:
+            before = old_points.get(point['n'])
+            if before and before['per_op_sec'] > 0:
+                ratio = point['per_op_sec'] / before['per_op_sec']
+                if ratio > threshold:
+                    regressions.append(f"{name} @ n={point['n']}: {ratio:.2f}x slower per op")
+        if old.get('exponent') is not None and result.get('exponent') is not None:
+            if result['exponent'] - old['exponent'] > exponent_slack:
+                regressions.append(f"{name}: scaling exponent {old['exponent']:.2f} -> {result['exponent']:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    """
+    Command line entry point, e.g.
+    python benchmarks.py --sizes 1000 10000 100000 1000000 --output bench.json --compare baseline.json
+    """
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the PlayWise data structures.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", default=None, help="Benchmark names or prefixes to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak run")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    names = [name for name in BENCHMARKS
+             if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+
+    def progress(name, point):
+        peak = f"{point['peak_bytes'] / 1e6:.1f} MB" if point['peak_bytes'] is not None else "-"
+        print(f"{name:40} n={point['n']:<8} {point['per_op_sec'] * 1e6:12.3f} us/op  peak {peak}",
+              file=sys.stderr)
+
+    suite = run_suite(args.sizes, names, args.repeat, not args.no_memory, progress)
+    for name, result in suite['results'].items():
+        exponent = result['exponent']
+        print(f"{name:40} exponent {exponent:.2f}" if exponent is not None else f"{name:40} exponent n/a",
+              file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(suite, f, indent=2)
+    else:
+        json.dump(suite, sys.stdout, indent=2)
+        print()
+
+    regressions = check_peaks(suite)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions += compare(baseline, suite, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from song import Song
+
+CSV_FIELDS = ["song_id", "title", "artist", "duration", "genre", "rating"]
+
+
+def parse_row(row):
+    """
+    Validate one catalog row (a dict of raw values) and convert it to a tuple
+    (song_id, title, artist, duration, genre, rating). genre and rating are optional.
+    Raises ValueError with a short reason when the row is invalid.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    try:
+        song_id = int(row["song_id"])
+        duration = int(row["duration"])
+    except KeyError as missing:
+        raise ValueError(f"missing field {missing}")
+    except (TypeError, ValueError):
+        raise ValueError("song_id and duration must be integers")
+    title = row.get("title")
+    artist = row.get("artist")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("title is empty")
+    if not isinstance(artist, str) or not artist.strip():
+        raise ValueError("artist is empty")
+    if duration <= 0:
+        raise ValueError("duration must be positive")
+
+    genre = row.get("genre") or None
+    rating = row.get("rating")
+    if rating in (None, ""):
+        rating = None
+    else:
+        try:
+            rating = int(rating)
+        except (TypeError, ValueError):
+            raise ValueError("rating must be an integer")
+        if rating < 1 or rating > 5:
+            raise ValueError("rating must be between 1 and 5")
+    return song_id, title, artist, duration, genre, rating
+
+
+def parse_lines(fmt, header, first_line_no, lines):
+    """
+    Parse a chunk of raw lines. Runs in worker processes for parallel ingestion,
+    so it only returns plain tuples (cheap to send back), never Song objects.
+
+    Returns:
+        tuple: (count, rows, rejected) with count the number of non-blank lines,
+               rows as parse_row tuples and rejected as (line_no, reason).
+    """
+    rows = []
+    rejected = []
+    count = 0
+    if fmt == "csv":
+        reader = csv.reader(lines)
+        records = ((first_line_no + reader.line_num - 1, dict(zip(header, fields)))
+                   for fields in reader if fields)
+    else:
+        records = ((line_no, _load_json(line)) for line_no, line in enumerate(lines, first_line_no)
+                   if line.strip())
+    for line_no, record in records:
+        count += 1
+        try:
+            rows.append(parse_row(record))
+        except ValueError as reason:
+            rejected.append((line_no, str(reason)))
+    return count, rows, rejected
+
+
+def _load_json(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None  # Rejected by parse_row as "row is not an object"
+
+
+class IngestStats:
+    """
+    Counters reported by a catalog ingestion run.
+    """
+
+    def __init__(self, max_samples=100):
+        self.rows = 0            # Data rows read (header excluded)
+        self.accepted = 0        # Rows turned into songs
+        self.rejected = 0        # Rows failing validation
+        self.rejected_samples = []  # First (line_no, reason) pairs, bounded by max_samples
+        self.elapsed = 0.0       # Seconds spent ingesting
+        self._max_samples = max_samples
+
+    def reject(self, line_no, reason):
+        self.rejected += 1
+        if len(self.rejected_samples) < self._max_samples:
+            self.rejected_samples.append((line_no, reason))
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def print_report(self):
+        """
+        Print a short ingestion report.
+        """
+        print("\n--- Catalog Ingestion ---")
+        print(f"Rows read: {self.rows}")
+        print(f"Accepted: {self.accepted}")
+        print(f"Rejected: {self.rejected}")
+        print(f"Throughput: {self.rows_per_second:,.0f} rows/sec ({self.elapsed:.2f} sec)")
+        for line_no, reason in self.rejected_samples[:10]:
+            where = f"line {line_no}" if line_no is not None else "row"
+            print(f"  {where}: {reason}")
+
+
+class CatalogIngestor:
+    """
+    Streams a CSV or JSONL catalog into PlayWise with bounded memory.
+    Rows are read incrementally, validated, turned into Song objects in batches
+    and fed in bulk to the playlist, the lookup and the rating tree.
+    Optionally, parsing runs in a process pool for large files.
+    """
+
+    def __init__(self, playlist=None, lookup=None, rating_tree=None, batch_size=10000,
+                 max_rejected_samples=100):
+        """
+        Args:
+            playlist (PlaylistEngine, optional): Receives songs in file order.
+            lookup (SongLookup, optional): Receives songs; also used to reject known song IDs.
+            rating_tree (RatingBST, optional): Receives songs that have a rating.
+            batch_size (int): Rows per batch (and per worker chunk).
+            max_rejected_samples (int): Rejected rows kept in the report.
+        """
+        self.playlist = playlist
+        self.lookup = lookup
+        self.rating_tree = rating_tree
+        self.batch_size = batch_size
+        self.max_rejected_samples = max_rejected_samples
+
+    def ingest(self, source, fmt=None, workers=0):
+        """
+        Ingest a catalog.
+
+        Args:
+            source (str or file object): Path or text file object to read.
+            fmt (str, optional): "csv" or "jsonl"; inferred from the file name when omitted.
+            workers (int): Number of parsing processes; 0 parses in this process.
+
+        Returns:
+            IngestStats: Counts, rejected samples and throughput.
+
+        Time Complexity: O(n); memory stays O(batch_size * workers).
+        """
+        if fmt is None:
+            name = source if isinstance(source, str) else getattr(source, "name", "")
+            fmt = "jsonl" if str(name).lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported catalog format '{fmt}'.")
+
+        stats = IngestStats(self.max_rejected_samples)
+        self._seen_ids = set()
+        start = time.perf_counter()
+        if isinstance(source, str):
+            with open(source, newline="", encoding="utf-8") as f:
+                self._ingest_file(f, fmt, workers, stats)
+        else:
+            self._ingest_file(source, fmt, workers, stats)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _ingest_file(self, f, fmt, workers, stats):
+        header = None
+        first_line_no = 1
+        if fmt == "csv":
+            header_line = f.readline()
+            header = next(csv.reader([header_line]), None) or CSV_FIELDS
+            header = [field.strip() for field in header]
+            first_line_no = 2
+
+        if workers and workers > 1:
+            self._ingest_parallel(f, fmt, header, first_line_no, workers, stats)
+        elif fmt == "csv":
+            reader = csv.DictReader(f, fieldnames=header)
+            # DictReader skips blank rows; line_num is the physical line (header included)
+            self._ingest_serial(((reader.line_num + 1, row) for row in reader), stats)
+        else:
+            self._ingest_serial(((line_no, _load_json(line)) for line_no, line in enumerate(f, 1)
+                                 if line.strip()), stats)
+
+    def _ingest_serial(self, records, stats):
+        batch = []
+        for line_no, record in records:
+            stats.rows += 1
+            try:
+                batch.append(parse_row(record))
+            except ValueError as reason:
+                stats.reject(line_no, str(reason))
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch, stats)
+                batch = []
+        self._flush(batch, stats)
+
+    def _ingest_parallel(self, f, fmt, header, first_line_no, workers, stats):
+        """
+        Hand chunks of raw lines to a process pool. At most 2 * workers chunks are
+        in flight, and results are consumed in submission order so the playlist
+        keeps the file order. CSV fields spanning several lines are not supported here.
+        """
+        in_flight = deque()
+        line_no = first_line_no
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in self._line_chunks(f):
+                in_flight.append(pool.submit(parse_lines, fmt, header, line_no, chunk))
+                line_no += len(chunk)
+                if len(in_flight) >= 2 * workers:
+                    self._collect(in_flight.popleft().result(), stats)
+            while in_flight:
+                self._collect(in_flight.popleft().result(), stats)
+
+    def _line_chunks(self, f):
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _collect(self, result, stats):
+        count, rows, rejected = result
+        stats.rows += count
+        for line_no, reason in rejected:
+            stats.reject(line_no, reason)
+        self._flush(rows, stats)
+
+    def _flush(self, rows, stats):
+        """
+        Turn a batch of validated rows into Song objects and feed every target in bulk.
+        Duplicate song IDs (in the file or already in the lookup) are rejected.
+        """
+        if not rows:
+            return
+        songs = []
+        rated = []
+        seen_ids = self._seen_ids
+        known = self.lookup.id_map if self.lookup is not None else {}
+        for song_id, title, artist, duration, genre, rating in rows:
+            if song_id in seen_ids or song_id in known:
+                stats.reject(None, f"duplicate song_id {song_id}")
+                continue
+            seen_ids.add(song_id)
+            song = Song(song_id, title, artist, duration, genre)
+            songs.append(song)
+            if rating is not None:
+                rated.append((song, rating))
+
+        if self.playlist is not None:
+            self.playlist.extend(songs)
+        if self.lookup is not None:
+            self.lookup.add_songs(songs)
+        if self.rating_tree is not None:
+            self.rating_tree.insert_songs(rated)
+        stats.accepted += len(songs)
+
+
+def main(argv=None):
+    """
+    Command line entry point: python catalog_ingest.py CATALOG [--format csv|jsonl] [--workers N]
+    """
+    import argparse
+    from playlist_engine import PlaylistEngine
+    from rating_bst import RatingBST
+    from song_lookup import SongLookup
+
+    parser = argparse.ArgumentParser(description="Stream a CSV/JSONL catalog into PlayWise.")
+    parser.add_argument("catalog", help="Catalog file ('-' reads standard input)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--workers", type=int, default=0, help="Parsing processes (0 = in-process)")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    playlist, lookup, rating_tree = PlaylistEngine(), SongLookup(), RatingBST()
+    ingestor = CatalogIngestor(playlist, lookup, rating_tree, batch_size=args.batch_size)
+    if args.catalog == "-":
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        source = os.path.expanduser(args.catalog)
+    stats = ingestor.ingest(source, fmt=args.format, workers=args.workers)
+    stats.print_report()
+    print(f"Playlist size: {playlist.size}, rated songs: {sum(rating_tree.count_songs_by_rating().values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from playlist_engine import PlaylistEngine
+from rating_bst import RatingBST
+from song import Song
+from song_lookup import SongLookup
+
+
+class ReadSnapshot:
+    """
+    Immutable view of the PlayWise state published by the writer.
+    Built from tuples and read-only mappings, so any number of threads can
+    iterate and search it without locks while the writer keeps mutating the live structures.
+    """
+
+    def __init__(self, version, songs, pinned, reversed_flag, id_map, title_map, ratings):
+        self.version = version            # Publication number, increases with every commit
+        self.songs = songs                # Tuple of songs in display order
+        self.pinned = pinned              # Read-only {song_id: index}
+        self.reversed = reversed_flag
+        self.id_map = id_map              # Read-only {song_id: Song}
+        self.title_map = title_map        # Read-only {lowercase title: tuple of songs}
+        self.ratings = ratings            # Read-only {rating: tuple of songs}
+
+    @property
+    def size(self):
+        return len(self.songs)
+
+    def __len__(self):
+        return len(self.songs)
+
+    def __iter__(self):
+        return iter(self.songs)
+
+    def to_list(self):
+        """
+        Songs in display order as a new list.
+        Time Complexity: O(n)
+        """
+        return list(self.songs)
+
+    def song_at(self, index):
+        """
+        Song at a display index, or None. Same result as PlaylistEngine._get_node(index).song.
+        Time Complexity: O(1)
+        """
+        if 0 <= index < len(self.songs):
+            return self.songs[index]
+        return None
+
+    def search_by_id(self, song_id):
+        return self.id_map.get(song_id)
+
+    def search_by_title(self, title):
+        return self.title_map.get(title.lower(), ())
+
+    def search_by_rating(self, rating):
+        return self.ratings.get(rating, ())
+
+
+class CopyOnWriteState:
+    """
+    Read-copy-update wrapper around PlaylistEngine, SongLookup and RatingBST.
+
+    A single writer (serialized by a lock) mutates the live structures inside
+    write() and publishes a new ReadSnapshot when the block ends. Readers call
+    snapshot() and get the latest published view without taking any lock;
+    publishing is a single reference assignment, which is atomic in CPython.
+
+    Publishing copies only the components whose version changed, so batching
+    many edits in one write() block amortizes the O(n) copy.
+    """
+
+    def __init__(self, playlist=None, lookup=None, rating_tree=None):
+        self.playlist = playlist if playlist is not None else PlaylistEngine()
+        self.lookup = lookup if lookup is not None else SongLookup()
+        self.rating_tree = rating_tree if rating_tree is not None else RatingBST()
+        self._write_lock = threading.Lock()
+        self._published_versions = None
+        self._snapshot = None
+        self._publish()
+
+    def snapshot(self):
+        """
+        Latest published, immutable view. Never blocks.
+        Time Complexity: O(1)
+        """
+        return self._snapshot
+
+    @contextmanager
+    def write(self):
+        """
+        Exclusive write section. Yields (playlist, lookup, rating_tree); the changes
+        become visible to readers in one step when the block exits (even on error,
+        so readers always see what the live structures actually contain).
+        """
+        with self._write_lock:
+            try:
+                yield self.playlist, self.lookup, self.rating_tree
+            finally:
+                self._publish()
+
+    # --- Convenience single-operation writes ---
+
+    def add_song(self, song, rating=None):
+        with self.write() as (playlist, lookup, rating_tree):
+            playlist.add_song(song)
+            lookup.add_song(song)
+            rating_tree.insert_song(song, rating)
+
+    def delete_song(self, index):
+        with self.write() as (playlist, _, _):
+            return playlist.delete_song(index)
+
+    def move_song(self, from_index, to_index):
+        with self.write() as (playlist, _, _):
+            return playlist.move_song(from_index, to_index)
+
+    def rate_song(self, song_id, rating):
+        with self.write() as (_, lookup, rating_tree):
+            song = lookup.search_by_id(song_id)
+            if song is None:
+                return False
+            rating_tree.delete_song(song_id)
+            rating_tree.insert_song(song, rating)
+            return True
+
+    def _publish(self):
+        """
+        Build and publish a new ReadSnapshot, reusing the parts of the previous one
+        whose source component did not change.
+        Time Complexity: O(size of the changed components)
+        """
+        previous = self._snapshot
+        old_versions = self._published_versions or (None, None, None)
+        versions = (self.playlist.version, self.lookup.version, self.rating_tree.version)
+
+        if previous is not None and versions[0] == old_versions[0]:
+            songs, pinned, reversed_flag = previous.songs, previous.pinned, previous.reversed
+        else:
+            songs = self.playlist.to_list()
+            if self.playlist.reversed:
+                songs.reverse()
+            songs = tuple(songs)
+            pinned = MappingProxyType(dict(self.playlist.pinned_songs))
+            reversed_flag = self.playlist.reversed
+
+        if previous is not None and versions[1] == old_versions[1]:
+            id_map, title_map = previous.id_map, previous.title_map
+        else:
+            id_map = MappingProxyType(dict(self.lookup.id_map))
+            title_map = MappingProxyType({title: tuple(bucket) for title, bucket in self.lookup.title_map.items()})
+
+        if previous is not None and versions[2] == old_versions[2]:
+            ratings = previous.ratings
+        else:
+            buckets = {}
+
+            def collect(node):
+                if node is None:
+                    return
+                collect(node.left)
+                buckets[node.rating] = tuple(node.songs)
+                collect(node.right)
+
+            collect(self.rating_tree.root)
+            ratings = MappingProxyType(buckets)
+
+        version = previous.version + 1 if previous is not None else 0
+        self._published_versions = versions
+        self._snapshot = ReadSnapshot(version, songs, pinned, reversed_flag, id_map, title_map, ratings)
+
+
+def stress_test(readers=4, duration=2.0, initial_songs=2000, batch=8, seed=None):
+    """
+    Run one writer and several lock-free reader threads together and check that
+    every snapshot a reader sees is internally consistent.
+
+    Returns:
+        dict: Counters (reads, publishes) and the list of violations (empty on success).
+    """
+    rng = random.Random(seed)
+    state = CopyOnWriteState()
+    with state.write() as (playlist, lookup, rating_tree):
+        for song_id in range(initial_songs):
+            song = Song(song_id, f"Song {song_id}", f"Artist {song_id % 40}", 60 + song_id % 300)
+            playlist.add_song(song)
+            lookup.add_song(song)
+            rating_tree.insert_song(song, song_id % 5 + 1)
+
+    stop = threading.Event()
+    violations = []
+    reads = [0] * readers
+
+    def reader(slot):
+        last_version = -1
+        while not stop.is_set():
+            snap = state.snapshot()
+            if snap.version < last_version:
+                violations.append(f"reader {slot}: version went back")
+            last_version = snap.version
+            count = 0
+            for song in snap:  # Full iteration, like to_list()
+                if snap.search_by_id(song.song_id) is not song:
+                    violations.append(f"reader {slot}: song {song.song_id} missing from lookup")
+                    break
+                count += 1
+            if count != snap.size:
+                violations.append(f"reader {slot}: iterated {count} of {snap.size} songs")
+            rated = sum(len(snap.search_by_rating(r)) for r in range(1, 6))
+            if rated != len(snap.id_map):
+                violations.append(f"reader {slot}: {rated} rated songs for {len(snap.id_map)} known")
+            reads[slot] += 1
+
+    def writer():
+        next_id = initial_songs
+        while not stop.is_set():
+            with state.write() as (playlist, lookup, rating_tree):
+                for _ in range(batch):
+                    choice = rng.random()
+                    if choice < 0.4:
+                        song = Song(next_id, f"Song {next_id}", "Writer", 100)
+                        playlist.add_song(song)
+                        lookup.add_song(song)
+                        rating_tree.insert_song(song, rng.randint(1, 5))
+                        next_id += 1
+                    elif choice < 0.6 and playlist.size > 1:
+                        playlist.delete_song(rng.randrange(playlist.size))
+                    elif choice < 0.9 and playlist.size > 1:
+                        playlist.move_song(rng.randrange(playlist.size), rng.randrange(playlist.size))
+                    else:
+                        song_id = rng.randrange(next_id)
+                        song = lookup.search_by_id(song_id)
+                        rating_tree.delete_song(song_id)
+                        rating_tree.insert_song(song, rng.randint(1, 5))
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {'reads': sum(reads), 'publishes': state.snapshot().version, 'violations': violations}
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = stress_test(seed=1)
+    print(f"Reads: {result['reads']}, publishes: {result['publishes']}, "
+          f"violations: {len(result['violations'])}")
+    for violation in result['violations'][:10]:
+        print(f"  {violation}")
+    sys.exit(1 if result['violations'] else 0)
@@ -0,0 +1,222 @@
+import heapq
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from operator import itemgetter
+
+INT_RECORD = struct.Struct("<qq")   # key, song_id
+STR_HEADER = struct.Struct("<qI")   # song_id, key length; UTF-8 key bytes follow
+ID_CHUNK = 65536       # Song IDs per read/write of the final order file
+RECORD_OVERHEAD = 100  # Approximate bytes per in-memory (key, song_id) tuple besides the key itself
+
+_key = itemgetter(0)
+
+
+def _write_run(path, records, is_str):
+    """
+    Spill one sorted run of (key, song_id) records to a binary file.
+    Returns the number of bytes written.
+    """
+    with open(path, "wb", buffering=1 << 16) as f:
+        if is_str:
+            pack = STR_HEADER.pack
+            for key, song_id in records:
+                data = key.encode("utf-8")
+                f.write(pack(song_id, len(data)))
+                f.write(data)
+        else:
+            pack = INT_RECORD.pack
+            for record in records:
+                f.write(pack(*record))
+        return f.tell()
+
+
+def _write_ids(path, song_ids):
+    """
+    Write a stream of song IDs as raw int64 values. Returns the number written.
+    """
+    count = 0
+    chunk = array('q')
+    with open(path, "wb") as f:
+        for song_id in song_ids:
+            chunk.append(song_id)
+            if len(chunk) == ID_CHUNK:
+                chunk.tofile(f)
+                count += len(chunk)
+                del chunk[:]
+        chunk.tofile(f)
+        count += len(chunk)
+    return count
+
+
+def _read_ids(path):
+    """
+    Stream the song IDs of a file written by _write_ids.
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = array('q')
+            chunk.frombytes(f.read(chunk.itemsize * ID_CHUNK))
+            if not chunk:
+                return
+            yield from chunk
+
+
+def _read_run(path, is_str):
+    """
+    Stream the records of one run file back, in file order.
+    """
+    with open(path, "rb", buffering=1 << 16) as f:
+        if is_str:
+            header_size = STR_HEADER.size
+            unpack = STR_HEADER.unpack
+            while True:
+                header = f.read(header_size)
+                if not header:
+                    return
+                song_id, length = unpack(header)
+                yield f.read(length).decode("utf-8"), song_id
+        else:
+            while True:
+                chunk = f.read(INT_RECORD.size * 4096)
+                if not chunk:
+                    return
+                yield from INT_RECORD.iter_unpack(chunk)
+
+
+class ExternalSorter:
+    """
+    External merge sort for playlists whose sort working set does not fit in memory.
+
+    The playlist is walked once; (sort key, song_id) records are collected
+    until the memory budget is reached, sorted, and spilled to a temporary file as
+    a run. The runs are then merged as streams (at most max_fan_in files open at
+    once, with extra passes if needed) and the playlist is rebuilt from the merged
+    stream, so neither the song list nor the key list is ever fully materialized.
+
+    Runs hold consecutive stretches of the playlist, each sorted stably, and the
+    merge prefers earlier runs on ties, so equal keys come out in playlist order
+    and the result is identical to PlaylistEngine.sort_playlist (which is stable).
+
+    The final merge is streamed into one more file of song IDs. Only once that
+    file is complete are the existing nodes given their new songs, in place, so
+    no second chain of nodes is ever allocated and a failed sort (a disk error,
+    an unknown song ID) leaves the playlist exactly as it was.
+    """
+
+    def __init__(self, memory_budget=64 * 1024 * 1024, temp_dir=None, max_fan_in=64):
+        """
+        Args:
+            memory_budget (int): Approximate bytes of records held in memory per run.
+            temp_dir (str, optional): Where run files are written (default: system temp dir).
+            max_fan_in (int): Largest number of runs merged at once.
+        """
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+        self.max_fan_in = max(2, max_fan_in)
+        self.stats = {}  # Filled by every sort: records, runs, merge_passes, spilled_bytes
+
+    def sort_playlist(self, playlist, criteria="title", ascending=True, lookup=None):
+        """
+        Same result as playlist.sort_playlist(criteria, ascending).
+
+        Args:
+            lookup (SongLookup, optional): Used to turn song IDs back into Song objects.
+                Without it, an ID index is built during the walk (O(n) small entries,
+                much less than the full key list).
+
+        Returns:
+            bool: False (playlist unchanged) if a song ID cannot be mapped back to its song.
+
+        Time Complexity: O(n log n) comparisons, O(n) sequential disk I/O per merge pass
+        """
+        if criteria == "duration":
+            key_func = lambda s: s.duration
+        elif criteria == "recent":
+            key_func = lambda s: s.song_id
+        else:
+            if criteria != "title":
+                print("Unknown sorting criteria. Sorting by title by default.")
+            key_func = lambda s: s.title.lower()
+        is_str = criteria not in ("duration", "recent")
+        descending = not ascending
+        songs_by_id = lookup.id_map if lookup is not None else {}
+        self.stats = {'records': 0, 'runs': 0, 'merge_passes': 0, 'spilled_bytes': 0}
+
+        with tempfile.TemporaryDirectory(prefix="playwise-sort-", dir=self.temp_dir) as workdir:
+            runs = []
+            records = []
+            used = 0
+            count = 0
+            current = playlist.head
+            while current:
+                song = current.song
+                # Songs are restored by ID, so every ID must lead back to this very song
+                known = songs_by_id.get(song.song_id) if lookup is not None else \
+                    songs_by_id.setdefault(song.song_id, song)
+                if known is not song:
+                    print(f"Song ID {song.song_id} does not identify a single song. Playlist left unchanged.")
+                    return False
+                key = key_func(song)
+                records.append((key, song.song_id))
+                used += RECORD_OVERHEAD + (sys.getsizeof(key) if is_str else 0)
+                count += 1
+                current = current.next
+                if used >= self.memory_budget:
+                    runs.append(self._spill(workdir, records, is_str, descending))
+                    records = []
+                    used = 0
+            if records:
+                runs.append(self._spill(workdir, records, is_str, descending))
+                records = []
+            self.stats['records'] = count
+
+            # Reduce the number of runs until one final merge can stream them all
+            while len(runs) > self.max_fan_in:
+                merged_runs = []
+                for i in range(0, len(runs), self.max_fan_in):
+                    group = runs[i:i + self.max_fan_in]
+                    merged = heapq.merge(*(_read_run(path, is_str) for path in group),
+                                         key=_key, reverse=descending)
+                    merged_runs.append(self._spill(workdir, merged, is_str, None))
+                    for path in group:
+                        os.remove(path)
+                runs = merged_runs
+                self.stats['merge_passes'] += 1
+
+            # heapq.merge prefers earlier inputs on ties, and runs are in playlist order.
+            # The merged order goes to disk first; the playlist is untouched until it is complete.
+            merged = heapq.merge(*(_read_run(path, is_str) for path in runs), key=_key, reverse=descending)
+            order_path = os.path.join(workdir, "order.bin")
+            written = _write_ids(order_path, (song_id for _, song_id in merged))
+            self.stats['merge_passes'] += 1
+            self.stats['spilled_bytes'] += os.path.getsize(order_path)
+            if written != count:
+                print("Merged order is incomplete. Playlist left unchanged.")
+                return False
+
+            # Reuse the existing nodes: only their song references change
+            current = playlist.head
+            for song_id in _read_ids(order_path):
+                current.song = songs_by_id[song_id]
+                current = current.next
+
+        # Same bookkeeping as from_list: pins and the reversed flag are reset
+        playlist.reversed = False
+        playlist.pinned_songs = {}
+        playlist.version += 1
+        playlist.layout_version += 1
+        return True
+
+    def _spill(self, workdir, records, is_str, descending):
+        """
+        Write records as a new run file. descending=None means they are already sorted.
+        """
+        if descending is not None:
+            records.sort(key=_key, reverse=descending)  # Stable: ties stay in playlist order
+        path = os.path.join(workdir, f"run-{self.stats['runs']:06d}.bin")
+        self.stats['runs'] += 1
+        self.stats['spilled_bytes'] += _write_run(path, records, is_str)
+        return path
@@ -0,0 +1,165 @@
+import functools
+import threading
+import time
+import types
+from bisect import bisect_left
+
+from playback_history import PlaybackHistory
+from playlist_engine import PlaylistEngine
+from playlist_summary import PlaylistSummary
+from rating_bst import RatingBST
+from song_lookup import SongLookup
+
+# Latency histogram bucket upper bounds, in seconds (Prometheus "le" labels)
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+INSTRUMENTED_CLASSES = (PlaylistEngine, RatingBST, SongLookup, PlaybackHistory, PlaylistSummary)
+
+# Private methods that are hot enough to be worth their own series
+EXTRA_METHODS = {PlaylistEngine: ("_get_node",)}
+
+# Nodes a call walks, computed from its arguments before it runs
+NODE_COUNTERS = {
+    "PlaylistEngine._get_node": lambda self, args: args[0] if args and 0 <= args[0] < self.size else 0,
+    "PlaylistEngine.to_list": lambda self, args: self.size,
+    "PlaylistEngine.print_playlist": lambda self, args: self.size,
+}
+
+
+class OperationStats:
+    """
+    Call count, latency histogram and nodes traversed for one operation.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.nodes = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # Last slot is the +Inf overflow
+
+
+class Metrics:
+    """
+    Registry of per-operation statistics, filled by the instrumentation wrappers.
+    """
+
+    def __init__(self):
+        self.operations = {}  # Maps "Class.method" to OperationStats
+        self._lock = threading.Lock()
+
+    def observe(self, operation, seconds, nodes=0):
+        with self._lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = OperationStats()
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.nodes += nodes
+            stats.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+
+    def to_dict(self):
+        """
+        Plain-dictionary view, used by the snapshot dashboard.
+
+        Returns:
+            dict: {operation: {'calls', 'total_seconds', 'mean_seconds', 'nodes_traversed'}}
+        """
+        with self._lock:
+            return {
+                operation: {
+                    'calls': stats.count,
+                    'total_seconds': stats.total_seconds,
+                    'mean_seconds': stats.total_seconds / stats.count if stats.count else 0.0,
+                    'nodes_traversed': stats.nodes,
+                }
+                for operation, stats in sorted(self.operations.items())
+            }
+
+    def render_prometheus(self):
+        """
+        Prometheus text exposition format dump of every series.
+        """
+        lines = [
+            "# HELP playwise_operation_duration_seconds Latency of PlayWise operations.",
+            "# TYPE playwise_operation_duration_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self.operations.items())
+            for operation, stats in items:
+                label = f'operation="{operation}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'playwise_operation_duration_seconds_bucket{{{label},le="{bound:g}"}} {cumulative}')
+                lines.append(f'playwise_operation_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f"playwise_operation_duration_seconds_sum{{{label}}} {stats.total_seconds:.9f}")
+                lines.append(f"playwise_operation_duration_seconds_count{{{label}}} {stats.count}")
+            lines.append("# HELP playwise_operation_nodes_traversed_total Linked-list nodes walked by PlayWise operations.")
+            lines.append("# TYPE playwise_operation_nodes_traversed_total counter")
+            for operation, stats in items:
+                lines.append(f'playwise_operation_nodes_traversed_total{{operation="{operation}"}} {stats.nodes}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()  # Default registry
+
+_originals = {}  # Maps (class, method name) to the unwrapped function while enabled
+_active = threading.local()  # Per-thread stack of node counters of the calls in progress
+
+
+def _wrap(operation, func, metrics):
+    node_counter = NODE_COUNTERS.get(operation)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        stack = getattr(_active, "stack", None)
+        if stack is None:
+            stack = _active.stack = []
+        frame = [node_counter(self, args) if node_counter else 0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += frame[0]  # Nested walks (e.g. _get_node inside move_song) count for the caller too
+            metrics.observe(operation, elapsed, frame[0])
+
+    return wrapper
+
+
+def enable(metrics=None):
+    """
+    Instrument the public methods (and _get_node) of the core classes.
+    Disabled instrumentation costs nothing: the classes keep their original methods.
+    """
+    if _originals:
+        return
+    metrics = metrics if metrics is not None else METRICS
+    for cls in INSTRUMENTED_CLASSES:
+        names = [name for name, value in vars(cls).items()
+                 if not name.startswith("_") and isinstance(value, types.FunctionType)]
+        names.extend(EXTRA_METHODS.get(cls, ()))
+        for name in names:
+            func = vars(cls)[name]
+            _originals[(cls, name)] = func
+            setattr(cls, name, _wrap(f"{cls.__name__}.{name}", func, metrics))
+
+
+def disable():
+    """
+    Restore the original, uninstrumented methods.
+    """
+    for (cls, name), func in _originals.items():
+        setattr(cls, name, func)
+    _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def build_request(method, path, body=None, host="localhost"):
+    """
+    Encode one HTTP/1.1 keep-alive request.
+    """
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n")
+    return head.encode("latin-1") + data
+
+
+async def read_response(reader):
+    """
+    Read one response and return (status, body bytes).
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection.")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    body = await reader.readexactly(length) if length else b""
+    return status, body
+
+
+class LoadGenerator:
+    """
+    Drives a running PlayWise server over keep-alive connections with pipelining
+    and reports latency percentiles and throughput.
+    """
+
+    def __init__(self, host, port, connections=8, pipeline=4, requests=10000,
+                 playlists=16, songs=1000, read_ratio=0.8, seed=None):
+        self.host = host
+        self.port = port
+        self.connections = connections
+        self.pipeline = pipeline          # Requests in flight per connection
+        self.requests = requests          # Total measured requests
+        self.playlists = playlists
+        self.songs = songs
+        self.read_ratio = read_ratio      # Share of read requests in the mix
+        self.random = random.Random(seed)
+        self.latencies = []
+        self.statuses = {}
+
+    async def run(self):
+        """
+        Seed the catalog, run the measured workload and return the report dict.
+        """
+        await self._seed()
+        per_connection = [self.requests // self.connections] * self.connections
+        per_connection[0] += self.requests % self.connections
+        start = time.perf_counter()
+        await asyncio.gather(*(self._client(count) for count in per_connection))
+        elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    async def _seed(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        for song_id in range(1, self.songs + 1):
+            body = {"song_id": song_id, "title": f"Song {song_id}", "artist": f"Artist {song_id % 50}",
+                    "duration": 120 + song_id % 240}
+            writer.write(build_request("POST", f"/playlists/p{song_id % self.playlists}/songs", body))
+        await writer.drain()
+        for _ in range(self.songs):
+            await read_response(reader)
+        writer.close()
+
+    def _next_request(self):
+        playlist = f"p{self.random.randrange(self.playlists)}"
+        song_id = self.random.randint(1, self.songs)
+        if self.random.random() < self.read_ratio:
+            choice = self.random.random()
+            if choice < 0.4:
+                return build_request("GET", f"/songs/{song_id}")
+            if choice < 0.8:
+                return build_request("GET", f"/playlists/{playlist}?limit=10")
+            return build_request("GET", f"/playlists/{playlist}/snapshot")
+        choice = self.random.random()
+        if choice < 0.4:
+            return build_request("POST", f"/playlists/{playlist}/songs", {"song_id": song_id})
+        if choice < 0.7:
+            return build_request("POST", "/history", {"song_id": song_id})
+        if choice < 0.9:
+            return build_request("POST", "/ratings", {"song_id": song_id, "rating": self.random.randint(1, 5)})
+        return build_request("POST", f"/playlists/{playlist}/move", {"from_index": 0, "to_index": 1})
+
+    async def _client(self, count):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        sent_at = []  # Send timestamps of in-flight requests, oldest first
+        sent = received = 0
+        while received < count:
+            while sent < count and sent - received < self.pipeline:
+                writer.write(self._next_request())
+                sent_at.append(time.perf_counter())
+                sent += 1
+            await writer.drain()
+            status, _ = await read_response(reader)
+            self.latencies.append(time.perf_counter() - sent_at.pop(0))
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            received += 1
+        writer.close()
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "elapsed_sec": round(elapsed, 3),
+            "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            "status_counts": self.statuses,
+        }
+
+
+def main(argv=None):
+    """
+    Command line entry point, e.g.
+    python load_generator.py --port 8080 --connections 16 --pipeline 8 --requests 50000
+    """
+    parser = argparse.ArgumentParser(description="Load test a PlayWise server on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--pipeline", type=int, default=4, help="Requests in flight per connection")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--playlists", type=int, default=16)
+    parser.add_argument("--songs", type=int, default=1000)
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    generator = LoadGenerator(args.host, args.port, args.connections, args.pipeline, args.requests,
+                              args.playlists, args.songs, args.read_ratio, args.seed)
+    report = asyncio.run(generator.run())
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
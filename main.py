@@ -1,18 +1,55 @@
+import os
+import struct
+import sys
+import batch_runner
+import instrumentation
 from playlist_engine import PlaylistEngine
 from playback_history import PlaybackHistory
 from song import Song
 from rating_bst import RatingBST
 from system_snapshot import SystemSnapshot
 from playlist_summary import PlaylistSummary  # <-- New import
+from memory_accounting import MemoryAccountant
+from recency_filter import RecentlyPlayedSet
+from state_store import save_state, load_state
+
+STATE_FILE = "playwise_state.bin"  # Saved on exit, restored on the next start
+METRICS_ENV = "PLAYWISE_METRICS"    # Set to 1 to record per-operation metrics
 
 def main():
     playlist = PlaylistEngine()
     history = PlaybackHistory()
     rating_tree = RatingBST()
+    song_id_counter = 1
+
+    # restore() builds every live object up front: opening the file is instant, but
+    # rebuilding a very large state takes a while (about 1.8 s for 1M songs)
+    if os.path.exists(STATE_FILE):
+        try:
+            with load_state(STATE_FILE) as state:
+                playlist, history, rating_tree, lookup = state.restore()
+        except (OSError, ValueError, IndexError, struct.error) as e:
+            # Keep the unreadable file for inspection and start with an empty state
+            bad_file = STATE_FILE + ".bad"
+            print(f"Could not restore {STATE_FILE}: {e}")
+            try:
+                os.replace(STATE_FILE, bad_file)
+                print(f"Moved it to {bad_file}; starting with an empty playlist.")
+            except OSError as rename_error:
+                print(f"Could not move it aside ({rename_error}); starting with an empty playlist.")
+            playlist = PlaylistEngine()
+            history = PlaybackHistory()
+            rating_tree = RatingBST()
+        else:
+            song_id_counter = max(lookup.id_map, default=0) + 1
+            print(f"Restored {playlist.size} song(s) from {STATE_FILE}.")
+
+    # Songs played in the last few hours are shuffled to the back (option 10)
+    history.recency_filter = RecentlyPlayedSet()
+
     snapshot_module = SystemSnapshot(playlist, history, rating_tree)
     summary_module = PlaylistSummary(playlist)  # <-- Initialize summary module
-
-    song_id_counter = 1
+    memory_module = MemoryAccountant(playlist, history, rating_tree)
 
     while True:
         print("\n--- PlayWise Menu ---")
@@ -31,8 +68,9 @@ def main():
         print("13. Show songs by rating")
         print("14. Show system snapshot dashboard")
         print("15. Show Playlist Summary")  # <-- New menu option
+        print("16. Show memory report")
 
-        choice = input("Enter your choice (1-15): ")
+        choice = input("Enter your choice (1-16): ")
 
         if choice == '1':
             title = input("Enter song title: ")
@@ -76,6 +114,13 @@ def main():
             playlist.print_playlist()
 
         elif choice == '5':
+            try:
+                save_state(STATE_FILE, playlist, history, rating_tree)
+            except (OSError, struct.error) as e:
+                # Stay in the menu so the session is not lost; the previous state file is untouched
+                print(f"Could not save state to {STATE_FILE}: {e}")
+                continue
+            print(f"State saved to {STATE_FILE}.")
             print("Exiting PlayWise. Goodbye!")
             break
 
@@ -131,7 +176,7 @@ def main():
                 print("Unpinning failed.")
 
         elif choice == '10':
-            playlist.shuffle_playlist_with_pins()
+            playlist.shuffle_playlist_with_pins(history.recency_filter)
 
         elif choice == '11':
             print("Sort by: 1. Title 2. Duration 3. Recently Added")
@@ -200,11 +245,31 @@ def main():
             for rating, count in snapshot['song_count_by_rating'].items():
                 print(f"Rating {rating}: {count} song(s)")
 
+            if 'operation_metrics' in snapshot:
+                print("\nOperation Metrics:")
+                for operation, stats in snapshot['operation_metrics'].items():
+                    print(f"{operation}: {stats['calls']} call(s), "
+                          f"mean {stats['mean_seconds'] * 1e6:.1f} us, "
+                          f"{stats['nodes_traversed']} node(s) traversed")
+
         elif choice == '15':  # Playlist Summary option
             summary_module.print_summary()
 
+        elif choice == '16':
+            sample = input("Sample 1 in N songs (press Enter for an exact count): ").strip()
+            try:
+                sample_every = int(sample) if sample else None
+            except ValueError:
+                print("Invalid sample size.")
+                continue
+            memory_module.print_report(sample_every)
+
         else:
-            print("Invalid choice. Please enter a number between 1 and 15.")
+            print("Invalid choice. Please enter a number between 1 and 16.")
 
 if __name__ == "__main__":
+    if os.environ.get(METRICS_ENV) == "1":
+        instrumentation.enable()
+    if len(sys.argv) > 1:  # e.g. --batch trace.jsonl, see batch_runner.py
+        sys.exit(batch_runner.main(sys.argv[1:]))
     main()
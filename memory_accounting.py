@@ -0,0 +1,201 @@
+import sys
+import tracemalloc
+from itertools import islice
+
+from node import Node
+from playback_history import PlaybackHistory
+from playlist_engine import PlaylistEngine
+from rating_bst import BSTNode, RatingBST
+from song import Song
+from song_lookup import SongLookup
+
+_instance_bytes = {}  # Cache of measured per-instance sizes, keyed by class
+
+
+def instance_bytes(cls, factory):
+    """
+    Per-instance size of cls, measured once with tracemalloc by allocating a batch
+    of samples. This captures inline attribute storage that sys.getsizeof misses,
+    without touching (and enlarging) live objects.
+    """
+    size = _instance_bytes.get(cls)
+    if size is None:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        samples = [factory() for _ in range(1000)]
+        after = tracemalloc.get_traced_memory()[0]
+        if not was_tracing:
+            tracemalloc.stop()
+        size = _instance_bytes[cls] = max(1, (after - before - sys.getsizeof(samples)) // len(samples))
+    return size
+
+
+def _in_sample(song, every):
+    """
+    Deterministic hash sampling on the song ID: the same songs are picked in every
+    component, so shared songs are still de-duplicated inside the sample.
+    """
+    return (hash(song.song_id) * 2654435761 >> 16) % every == 0
+
+
+class MemoryAccountant:
+    """
+    Reports how many bytes each PlayWise component holds.
+
+    Component figures cover the structure only (linked-list nodes, rating buckets,
+    lookup maps, the history stack). Song objects are referenced from several
+    components, so they are reported once, in a separate 'songs' entry, together
+    with their strings and IDs (each distinct object counted once).
+
+    Exact mode visits every song. Sampling mode (sample_every=k) measures only the
+    songs whose ID hashes into a 1-in-k sample and scales the result, which skips
+    almost all of the per-song measuring on huge states.
+    """
+
+    def __init__(self, playlist_engine, playback_history, rating_bst, song_lookup=None):
+        """
+        Args:
+            playlist_engine (PlaylistEngine): The playlist manager instance.
+            playback_history (PlaybackHistory): The playback history stack instance.
+            rating_bst (RatingBST): The rating binary search tree instance.
+            song_lookup (SongLookup, optional): The lookup maps, when the caller keeps them.
+        """
+        self.playlist_engine = playlist_engine
+        self.playback_history = playback_history
+        self.rating_bst = rating_bst
+        self.song_lookup = song_lookup
+
+    def report(self, sample_every=None):
+        """
+        Walk every component and account for its memory.
+
+        Args:
+            sample_every (int, optional): Measure roughly 1 in sample_every songs and
+                scale up. None or 1 gives an exact count.
+
+        Returns:
+            dict: {'components': {name: {'bytes', 'songs', 'bytes_per_song'}},
+                   'songs': {'bytes', 'songs', 'bytes_per_song'},
+                   'total_bytes': int, 'sample_every': int}
+        """
+        every = sample_every if sample_every and sample_every > 1 else 1
+        seen_songs = set()
+        seen_values = set()
+        song_bytes = [0]
+        song_size = instance_bytes(Song, lambda: Song(0, "", "", 0))
+
+        def visit(songs):
+            # Measure each distinct Song (and its distinct field values) once
+            for song in songs:
+                if id(song) in seen_songs or (every > 1 and not _in_sample(song, every)):
+                    continue
+                seen_songs.add(id(song))
+                song_bytes[0] += song_size
+                for value in (song.song_id, song.title, song.artist, song.duration, song.genre):
+                    if value is not None and id(value) not in seen_values:
+                        seen_values.add(id(value))
+                        song_bytes[0] += sys.getsizeof(value)
+
+        components = {
+            'playlist': self._playlist_bytes(visit),
+            'rating_tree': self._rating_tree_bytes(visit),
+            'history': self._history_bytes(visit),
+        }
+        if self.song_lookup is not None:
+            components['lookup'] = self._lookup_bytes(visit, every)
+
+        for entry in components.values():
+            entry['bytes_per_song'] = entry['bytes'] / entry['songs'] if entry['songs'] else 0.0
+
+        distinct = len(seen_songs) * every
+        shared = {'bytes': song_bytes[0] * every, 'songs': distinct,
+                  'bytes_per_song': song_bytes[0] / len(seen_songs) if seen_songs else 0.0}
+        total = shared['bytes'] + sum(entry['bytes'] for entry in components.values())
+        return {'components': components, 'songs': shared, 'total_bytes': total, 'sample_every': every}
+
+    def print_report(self, sample_every=None):
+        """
+        Print the memory report in a readable table.
+        """
+        report = self.report(sample_every)
+        print("\n--- Memory Report ---")
+        if report['sample_every'] > 1:
+            print(f"(Estimated from a 1-in-{report['sample_every']} sample of songs)")
+        for name, entry in report['components'].items():
+            print(f"{name:12}: {entry['bytes'] / 1024:10.1f} KiB for {entry['songs']} song reference(s) "
+                  f"({entry['bytes_per_song']:.1f} bytes/song)")
+        shared = report['songs']
+        print(f"{'songs':12}: {shared['bytes'] / 1024:10.1f} KiB for {shared['songs']} distinct song(s) "
+              f"({shared['bytes_per_song']:.1f} bytes/song, counted once)")
+        print(f"{'total':12}: {report['total_bytes'] / 1024:10.1f} KiB")
+
+    def _playlist_bytes(self, visit):
+        """
+        Engine object, one Node per song and the pin map.
+        Time Complexity: O(n), the linked list has to be walked to reach the songs
+        """
+        engine = self.playlist_engine
+        # A sample engine already includes an empty pin map; the real one is added below
+        total = instance_bytes(PlaylistEngine, PlaylistEngine) - sys.getsizeof({})
+        total += engine.size * instance_bytes(Node, lambda: Node(None))
+        total += sys.getsizeof(engine.pinned_songs)
+
+        def songs():
+            current = engine.head
+            while current:
+                yield current.song
+                current = current.next
+
+        visit(songs())
+        return {'bytes': total, 'songs': engine.size}
+
+    def _rating_tree_bytes(self, visit):
+        """
+        Tree object plus one BSTNode and song list per rating bucket.
+        Time Complexity: O(b + k), b = buckets, k = rated songs
+        """
+        # A sample BSTNode already includes an empty songs list; the real list is added per bucket
+        bst_node_bytes = instance_bytes(BSTNode, lambda: BSTNode(0)) - sys.getsizeof([])
+        total = instance_bytes(RatingBST, RatingBST)
+        count = 0
+        stack = [self.rating_bst.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            total += bst_node_bytes + sys.getsizeof(node.songs)
+            count += len(node.songs)
+            visit(node.songs)
+            stack.append(node.left)
+            stack.append(node.right)
+        return {'bytes': total, 'songs': count}
+
+    def _history_bytes(self, visit):
+        """
+        History object and its stack list.
+        Time Complexity: O(k), k = played songs
+        """
+        history = self.playback_history
+        total = instance_bytes(PlaybackHistory, PlaybackHistory) - sys.getsizeof([])
+        total += sys.getsizeof(history.stack)
+        visit(history.stack)
+        return {'bytes': total, 'songs': len(history.stack)}
+
+    def _lookup_bytes(self, visit, every):
+        """
+        Lookup object, the ID map, the title map with its lowercase keys and
+        per-title lists. In sampling mode only 1 in 'every' titles is measured.
+        Time Complexity: O(n + t), t = distinct titles (O(n + t / every) when sampling)
+        """
+        lookup = self.song_lookup
+        total = instance_bytes(SongLookup, SongLookup) - 2 * sys.getsizeof({})
+        total += sys.getsizeof(lookup.id_map) + sys.getsizeof(lookup.title_map)
+        title_bytes = 0
+        titles = islice(lookup.title_map.items(), 0, None, every)
+        for title, bucket in titles:
+            title_bytes += sys.getsizeof(title) + sys.getsizeof(bucket)
+        total += title_bytes * every
+        visit(lookup.id_map.values())
+        return {'bytes': total, 'songs': len(lookup.id_map)}
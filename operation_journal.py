@@ -0,0 +1,557 @@
+import contextlib
+import os
+import struct
+import threading
+import time
+import zlib
+
+from playlist_engine import PlaylistEngine
+from playback_history import PlaybackHistory
+from rating_bst import RatingBST
+from song import Song
+from song_lookup import SongLookup
+from state_store import save_state, load_state
+
+# Operation codes stored in each journal record
+OP_ADD = 1
+OP_DELETE = 2
+OP_MOVE = 3
+OP_PIN = 4
+OP_UNPIN = 5
+OP_RATE = 6
+OP_PLAY = 7
+OP_UNDO = 8
+OP_REVERSE = 9
+OP_SORT = 10
+OP_ORDER = 11  # Full playlist order by song ID (used for shuffles, which are not replayable)
+
+# Record layout: payload length, CRC32 of (seq, op, payload), sequence number, op code, payload
+RECORD_HEADER = struct.Struct("<IIQB")
+SEQ_OP = struct.Struct("<QB")
+
+# Fixed-width payloads; OP_ADD and OP_ORDER are encoded separately
+PAYLOADS = {
+    OP_DELETE: struct.Struct("<I"),     # index
+    OP_MOVE: struct.Struct("<II"),      # from_index, to_index
+    OP_PIN: struct.Struct("<qI"),       # song_id, index
+    OP_UNPIN: struct.Struct("<q"),      # song_id
+    OP_RATE: struct.Struct("<qB"),      # song_id, rating
+    OP_PLAY: struct.Struct("<q"),       # song_id
+    OP_UNDO: struct.Struct("<"),
+    OP_REVERSE: struct.Struct("<"),
+    OP_SORT: struct.Struct("<BB"),      # criteria code, ascending
+}
+ADD_FIXED = struct.Struct("<qi")        # song_id, duration (signed, as in state_store); followed by title, artist, genre
+STRING_LENGTH = struct.Struct("<I")
+NO_STRING = 0xFFFFFFFF  # Length marking a missing value; real strings must be shorter
+SORT_CRITERIA = ["title", "duration", "recent"]
+
+
+def _encode_payload(op, fields):
+    """
+    Encode the operation fields into the compact binary payload.
+    Raises struct.error or ValueError when a field cannot be represented.
+    """
+    if op == OP_ADD:
+        song_id, title, artist, duration, genre = fields
+        parts = [ADD_FIXED.pack(song_id, duration)]
+        for value in (title, artist, genre):
+            if value is None:
+                parts.append(STRING_LENGTH.pack(NO_STRING))
+            else:
+                data = value.encode("utf-8")
+                if len(data) >= NO_STRING:
+                    raise ValueError("string too long for the journal")
+                parts.append(STRING_LENGTH.pack(len(data)))
+                parts.append(data)
+        return b"".join(parts)
+    if op == OP_ORDER:
+        song_ids = fields[0]
+        return struct.pack(f"<I{len(song_ids)}q", len(song_ids), *song_ids)
+    return PAYLOADS[op].pack(*fields)
+
+
+def _decode_payload(op, payload):
+    """
+    Decode a binary payload back into the operation fields.
+    """
+    if op == OP_ADD:
+        song_id, duration = ADD_FIXED.unpack_from(payload, 0)
+        offset = ADD_FIXED.size
+        strings = []
+        for _ in range(3):
+            (length,) = STRING_LENGTH.unpack_from(payload, offset)
+            offset += STRING_LENGTH.size
+            if length == NO_STRING:
+                strings.append(None)
+            else:
+                strings.append(payload[offset:offset + length].decode("utf-8"))
+                offset += length
+        title, artist, genre = strings
+        return song_id, title, artist, duration, genre
+    if op == OP_ORDER:
+        (count,) = struct.unpack_from("<I", payload, 0)
+        return (list(struct.unpack_from(f"<{count}q", payload, 4)),)
+    return PAYLOADS[op].unpack(payload)
+
+
+def read_journal(path):
+    """
+    Read every intact record of a journal file.
+    Reading stops at the first truncated or corrupted record (a torn write from a crash).
+
+    Returns:
+        tuple: (records, valid_length) where records is a list of (seq, op, fields)
+               and valid_length is the byte length of the intact prefix.
+    """
+    records = []
+    if not os.path.exists(path):
+        return records, 0
+    with open(path, "rb") as f:
+        data = f.read()
+
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, crc, seq, op = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(SEQ_OP.pack(seq, op) + payload) != crc:
+            break
+        records.append((seq, op, _decode_payload(op, payload)))
+        offset = start + length
+    return records, offset
+
+
+class OperationJournal:
+    """
+    Append-only write-ahead journal of PlayWise mutations.
+    Records are buffered and made durable with group commit: one fsync covers
+    every record appended since the previous one, and happens when group_size
+    records are pending or group_interval seconds have passed.
+    """
+
+    def __init__(self, path, next_seq=1, group_size=64, group_interval=0.05):
+        """
+        Args:
+            path (str): Journal file, opened for appending.
+            next_seq (int): Sequence number given to the next record.
+            group_size (int): Pending records that force an fsync.
+            group_interval (float): Maximum seconds a record may wait for its fsync.
+                A background thread enforces it; 0 disables the thread.
+        """
+        self.path = path
+        self.next_seq = next_seq
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self._pending = 0          # Records written but not yet fsynced
+        self._last_sync = time.monotonic()
+        self._stop = threading.Event()
+        self._flusher = None
+        if group_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    @property
+    def last_seq(self):
+        """
+        Sequence number of the most recently appended record (0 when none).
+        """
+        return self.next_seq - 1
+
+    def append(self, op, fields=(), payload=None):
+        """
+        Append one record and return its sequence number.
+        'payload' may carry the fields already encoded, to skip encoding them again.
+        Time Complexity: O(size of the record), plus an fsync once per group.
+        """
+        if payload is None:
+            payload = _encode_payload(op, fields)
+        with self._lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            crc = zlib.crc32(SEQ_OP.pack(seq, op) + payload)
+            self._file.write(RECORD_HEADER.pack(len(payload), crc, seq, op))
+            self._file.write(payload)
+            self._pending += 1
+            if (self._pending >= self.group_size or
+                    time.monotonic() - self._last_sync >= self.group_interval):
+                self._sync_locked()
+        return seq
+
+    def sync(self):
+        """
+        Force every pending record to disk.
+        """
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        self._file.flush()
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _flush_loop(self):
+        """
+        Background group-commit timer: syncs pending records every group_interval seconds.
+        """
+        while not self._stop.wait(self.group_interval):
+            with self._lock:
+                if self._pending:
+                    self._sync_locked()
+
+    def checkpoint_offset(self):
+        """
+        Flush and return the current end of the file; every record appended so far lies before it.
+        """
+        with self._lock:
+            self._sync_locked()
+            return self._file.tell()
+
+    def discard_prefix(self, offset):
+        """
+        Drop the first 'offset' bytes of the journal (records already folded into a snapshot).
+        The remaining tail is copied to a new file that atomically replaces the journal.
+        """
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+            tmp_path = self.path + ".tmp"
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                src.seek(offset)
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "ab")
+
+    def close(self):
+        """
+        Stop the background flusher, sync and close the file.
+        """
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+
+
+class JournaledState:
+    """
+    PlayWise state (playlist, history, ratings, lookup) whose mutations are
+    written to an OperationJournal. On startup the latest snapshot is loaded
+    and the journal tail after its checkpoint is replayed. Compaction folds the
+    journal into a fresh snapshot, optionally in a background thread.
+    """
+
+    def __init__(self, snapshot_path, journal_path, group_size=64, group_interval=0.05,
+                 compact_every=None):
+        """
+        Open (or create) the state and recover it from disk.
+
+        Args:
+            snapshot_path (str): State file written by compaction (see state_store).
+            journal_path (str): Journal file.
+            group_size (int): Group-commit size passed to the journal.
+            group_interval (float): Group-commit interval passed to the journal.
+            compact_every (int, optional): Start a background compaction after this many records.
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self._lock = threading.RLock()  # Serializes mutations with compaction captures
+        self._compaction = None
+        self._records_since_compaction = 0
+        self._next_compaction = compact_every  # Record count that triggers the next automatic compaction
+        self.compaction_error = None  # Failure of a background compaction, raised by compact() or close()
+
+        checkpoint_seq = 0
+        if os.path.exists(snapshot_path):
+            with load_state(snapshot_path) as state:
+                self.playlist, self.history, self.rating_tree, self.lookup = state.restore()
+                checkpoint_seq = state.checkpoint_seq
+        else:
+            self.playlist = PlaylistEngine()
+            self.history = PlaybackHistory()
+            self.rating_tree = RatingBST()
+            self.lookup = SongLookup()
+
+        # Replay the journal tail, then cut off any torn record left by a crash
+        records, valid_length = read_journal(journal_path)
+        last_seq = checkpoint_seq
+        replayed = 0
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+            for seq, op, fields in records:
+                if seq > checkpoint_seq:
+                    self._apply(op, fields)
+                    replayed += 1
+                last_seq = max(last_seq, seq)
+        if os.path.exists(journal_path) and os.path.getsize(journal_path) > valid_length:
+            with open(journal_path, "r+b") as f:
+                f.truncate(valid_length)
+        self.replayed_records = replayed
+
+        self.journal = OperationJournal(journal_path, next_seq=last_seq + 1,
+                                        group_size=group_size, group_interval=group_interval)
+
+    # --- Journaled mutations ---
+
+    def add_song(self, song):
+        """
+        Add a song to the playlist and the lookup.
+        """
+        return self._record(OP_ADD, (song.song_id, song.title, song.artist, song.duration, song.genre))
+
+    def delete_song(self, index):
+        """
+        Delete the song at the given playlist index.
+        """
+        return self._record(OP_DELETE, (index,))
+
+    def move_song(self, from_index, to_index):
+        """
+        Move a song within the playlist.
+        """
+        return self._record(OP_MOVE, (from_index, to_index))
+
+    def pin_song(self, song_id, index):
+        """
+        Pin a song at a playlist position.
+        """
+        return self._record(OP_PIN, (song_id, index))
+
+    def unpin_song(self, song_id):
+        """
+        Remove a pin.
+        """
+        return self._record(OP_UNPIN, (song_id,))
+
+    def rate_song(self, song_id, rating):
+        """
+        Set (or replace) the rating of a known song.
+        """
+        return self._record(OP_RATE, (song_id, rating))
+
+    def play_song(self, song_id):
+        """
+        Push a known song onto the playback history.
+        """
+        return self._record(OP_PLAY, (song_id,))
+
+    def undo_last_play(self):
+        """
+        Pop the last played song and re-add it to the playlist, as the menu does.
+        """
+        return self._record(OP_UNDO, ())
+
+    def reverse_playlist(self):
+        """
+        Toggle the playlist's reversed flag.
+        """
+        return self._record(OP_REVERSE, ())
+
+    def sort_playlist(self, criteria="title", ascending=True):
+        """
+        Sort the playlist; the criteria is journaled, not the resulting order.
+        """
+        if criteria not in SORT_CRITERIA:
+            criteria = "title"
+        return self._record(OP_SORT, (SORT_CRITERIA.index(criteria), int(ascending)))
+
+    def shuffle_playlist_with_pins(self, recent_filter=None, recent_mode="demote"):
+        """
+        Shuffle the playlist. The outcome is random, so the resulting order is journaled.
+        With recent_mode="exclude" the playlist is not modified (the play order is
+        returned instead), so nothing is journaled.
+        """
+        with self._lock:
+            play_order = self.playlist.shuffle_playlist_with_pins(recent_filter, recent_mode)
+            if recent_filter is not None and recent_mode == "exclude":
+                return play_order
+            order = [song.song_id for song in self.playlist.to_list()]
+            self._log(OP_ORDER, (order,))
+        return True
+
+    def _record(self, op, fields):
+        """
+        Apply an operation and journal it if it changed the state.
+        The fields are encoded first, so an operation that cannot be journaled
+        is rejected before it touches the in-memory state.
+        """
+        try:
+            payload = _encode_payload(op, fields)
+        except (struct.error, ValueError) as e:
+            print(f"Operation rejected: {e}")
+            return False
+        with self._lock:
+            result = self._apply(op, fields)
+            if result is not False:
+                self._log(op, fields, payload)
+        return result
+
+    def _log(self, op, fields, payload=None):
+        self.journal.append(op, fields, payload)
+        self._records_since_compaction += 1
+        if self.compact_every and self._records_since_compaction >= self._next_compaction:
+            self._start_compaction(background=True)
+
+    def _apply(self, op, fields):
+        """
+        Apply one operation to the in-memory structures. Used both for live calls and replay.
+        Returns False when the operation was rejected and therefore must not be journaled.
+        """
+        if op == OP_ADD:
+            song_id, title, artist, duration, genre = fields
+            song = self.lookup.search_by_id(song_id) or Song(song_id, title, artist, duration, genre)
+            self.playlist.add_song(song)
+            self.lookup.add_song(song)
+            return True
+        if op == OP_DELETE:
+            return self.playlist.delete_song(*fields)
+        if op == OP_MOVE:
+            return self.playlist.move_song(*fields)
+        if op == OP_PIN:
+            return self.playlist.pin_song(*fields)
+        if op == OP_UNPIN:
+            return self.playlist.unpin_song(*fields)
+        if op == OP_RATE:
+            song_id, rating = fields
+            song = self.lookup.search_by_id(song_id)
+            if song is None or not 1 <= rating <= 5:
+                return False
+            self.rating_tree.delete_song(song_id)
+            self.rating_tree.insert_song(song, rating)
+            return True
+        if op == OP_PLAY:
+            song = self.lookup.search_by_id(fields[0])
+            if song is None:
+                return False
+            self.history.push_song(song)
+            return True
+        if op == OP_UNDO:
+            song = self.history.undo_last_play()
+            if song is None:
+                return False
+            self.playlist.add_song(song)
+            return True
+        if op == OP_REVERSE:
+            self.playlist.reverse_playlist()
+            return True
+        if op == OP_SORT:
+            criteria, ascending = fields
+            self.playlist.sort_playlist(SORT_CRITERIA[criteria], bool(ascending))
+            return True
+        if op == OP_ORDER:
+            self.playlist.from_list([self.lookup.search_by_id(song_id) for song_id in fields[0]])
+            return True
+        raise ValueError(f"Unknown journal operation {op}.")
+
+    # --- Compaction ---
+
+    def compact(self, background=False):
+        """
+        Fold the journal into a fresh snapshot and drop the folded records.
+        The state is captured under the lock (an O(n) in-memory copy); writing the
+        snapshot happens outside it, so mutations continue during a background compaction.
+
+        If an earlier background compaction failed, its exception is raised here
+        (once) instead of starting a new compaction.
+
+        Returns:
+            threading.Thread or None: The compaction thread when background=True.
+        """
+        self._raise_compaction_error()
+        return self._start_compaction(background)
+
+    def _start_compaction(self, background):
+        """
+        Compaction itself; also started automatically by _log every compact_every records.
+        The record counter only goes down once the snapshot is written, so a failed
+        compaction is retried after a quarter of compact_every more records.
+        """
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return self._compaction  # One compaction at a time
+            captured = self._capture()
+            checkpoint_seq = self.journal.last_seq
+            offset = self.journal.checkpoint_offset()
+            folded = self._records_since_compaction
+
+        def run():
+            save_state(self.snapshot_path, *captured, checkpoint_seq=checkpoint_seq)
+            with self._lock:
+                self.journal.discard_prefix(offset)
+                self._records_since_compaction -= folded
+                self._next_compaction = self.compact_every
+                self.compaction_error = None  # A later success supersedes an earlier failure
+
+        def run_in_background():
+            try:
+                run()
+            except Exception as error:  # Kept for the next compact() or close()
+                with self._lock:
+                    self.compaction_error = error
+                    if self.compact_every:
+                        self._next_compaction = (self._records_since_compaction +
+                                                 max(1, self.compact_every // 4))
+                print(f"Background compaction failed: {error}")
+
+        if not background:
+            run()
+            return None
+        self._compaction = threading.Thread(target=run_in_background, daemon=True)
+        self._compaction.start()
+        return self._compaction
+
+    def _raise_compaction_error(self):
+        with self._lock:
+            error, self.compaction_error = self.compaction_error, None
+        if error is not None:
+            raise error
+
+    def _capture(self):
+        """
+        Copy the structures' shape (not the Song objects) so a snapshot can be
+        written while the originals keep changing.
+        """
+        playlist = PlaylistEngine()
+        playlist.from_list(self.playlist.to_list())
+        playlist.pinned_songs = dict(self.playlist.pinned_songs)
+        playlist.reversed = self.playlist.reversed
+
+        history = PlaybackHistory()
+        history.stack = list(self.history.stack)
+
+        rating_tree = RatingBST()
+
+        def copy_buckets(node):
+            if node is None:
+                return
+            copy_buckets(node.left)
+            for song in node.songs:
+                rating_tree.insert_song(song, node.rating)
+            copy_buckets(node.right)
+
+        copy_buckets(self.rating_tree.root)
+
+        lookup = SongLookup()
+        lookup.id_map = dict(self.lookup.id_map)  # save_state only reads id_map
+        return playlist, history, rating_tree, lookup
+
+    def close(self):
+        """
+        Wait for a running compaction and close the journal.
+        Raises the exception of a failed background compaction, after closing.
+        """
+        if self._compaction is not None:
+            self._compaction.join()
+        self.journal.close()
+        self._raise_compaction_error()
@@ -4,8 +4,12 @@ class PlaybackHistory:
     Allows tracking recently played songs and supports undoing the last played song.
     """
 
-    def __init__(self):
+    def __init__(self, recency_filter=None):
         self.stack = []  # Stack to hold recently played songs, with the most recent on top
+        self.version = 0  # Incremented on every push or undo so readers can detect changes
+        # Optional RecentlyPlayedSet / RotatingBloomFilter, fed on every push
+        # (an undone play still counts as heard)
+        self.recency_filter = recency_filter
 
     def push_song(self, song):
         """
@@ -13,6 +17,9 @@ class PlaybackHistory:
         Time Complexity: O(1)
         """
         self.stack.append(song)
+        self.version += 1
+        if self.recency_filter is not None:
+            self.recency_filter.record(song.song_id)
 
     def undo_last_play(self):
         """
@@ -23,6 +30,7 @@ class PlaybackHistory:
         if not self.stack:
             print("No song to undo.")  # Inform user if no songs are in history
             return None
+        self.version += 1
         return self.stack.pop()  # Remove and return the last played song
 
     def print_history(self):
@@ -0,0 +1,151 @@
+from bisect import bisect_left
+from playlist_engine import PlaylistEngine
+from recency_filter import split_recent
+
+class PlaylistBuilder:
+    """
+    Builds new playlists that fill a target duration ("45 minutes of my 4- and 5-star songs").
+    Candidates come from the rating BST (when a rating range is given) or from the playlist,
+    are filtered by genre and artist, and a near-optimal subset is chosen with a
+    greedy subset-sum approximation over a duration index.
+    """
+
+    def __init__(self, playlist, rating_tree):
+        """
+        Initialize with references to the song sources.
+
+        Args:
+            playlist (PlaylistEngine): Source of candidates when no rating range is given.
+            rating_tree (RatingBST): Source of candidates filtered by rating.
+        """
+        self.playlist = playlist
+        self.rating_tree = rating_tree
+
+    def build(self, target_duration, tolerance=60, min_rating=None, max_rating=None,
+              genres=None, exclude_artists=None, recent_filter=None, recent_mode="demote"):
+        """
+        Build a new playlist whose total duration is as close as possible to target_duration.
+
+        Args:
+            target_duration (int): Desired total playtime in seconds.
+            tolerance (int): Accepted distance (in seconds) from the target.
+            min_rating (int, optional): Lowest rating to include (1-5).
+            max_rating (int, optional): Highest rating to include (1-5).
+            genres (iterable, optional): Genres to keep (case-insensitive).
+            exclude_artists (iterable, optional): Artists to leave out (case-insensitive).
+            recent_filter (optional): Set-like recency filter (see recency_filter.py).
+            recent_mode (str): "demote" (default, as in shuffle_playlist_with_pins) only uses
+                recently played songs to fill whatever gap the other songs leave;
+                "exclude" leaves them out.
+
+        Returns:
+            PlaylistEngine: A new playlist holding the chosen songs, in candidate order.
+
+        Time Complexity: O(n log n), n = number of candidates
+        """
+        candidates = self._candidates(min_rating, max_rating, genres, exclude_artists)
+        if recent_filter is None:
+            chosen = self._select(candidates, target_duration)
+        else:
+            fresh, recent = split_recent(candidates, recent_filter)
+            chosen = self._select(fresh, target_duration)
+            gap = target_duration - sum(song.duration for song in chosen)
+            if recent_mode == "demote" and gap > tolerance and recent:
+                chosen += self._select(recent, gap)
+            if recent_mode == "exclude":
+                candidates = fresh
+
+        # Keep the chosen songs in candidate order (highest rating bucket first)
+        chosen_ids = {song.song_id for song in chosen}
+        new_playlist = PlaylistEngine()
+        for song in candidates:
+            if song.song_id in chosen_ids:
+                new_playlist.add_song(song)
+
+        total = sum(song.duration for song in chosen)
+        if abs(total - target_duration) > tolerance:
+            print(f"Could only reach {total} sec for a target of {target_duration} sec "
+                  f"(tolerance {tolerance} sec).")
+        return new_playlist
+
+    def _candidates(self, min_rating, max_rating, genres, exclude_artists):
+        """
+        Collect the songs that pass every filter, dropping duplicate song IDs.
+        Time Complexity: O(n)
+        """
+        if min_rating is not None or max_rating is not None:
+            low = min_rating if min_rating is not None else 1
+            high = max_rating if max_rating is not None else 5
+            songs = self.rating_tree.search_by_rating_range(low, high)
+        else:
+            songs = self.playlist.to_list()
+
+        genre_set = {g.lower() for g in genres} if genres else None
+        excluded = {a.lower() for a in exclude_artists} if exclude_artists else set()
+
+        candidates = []
+        seen_ids = set()
+        for song in songs:
+            if song.song_id in seen_ids or song.duration <= 0:
+                continue
+            if genre_set is not None and (song.genre is None or song.genre.lower() not in genre_set):
+                continue
+            if song.artist.lower() in excluded:
+                continue
+            seen_ids.add(song.song_id)
+            candidates.append(song)
+        return candidates
+
+    def _select(self, candidates, target_duration):
+        """
+        Approximate subset-sum: greedy first-fit over the duration index (longest first),
+        followed by one improvement step that swaps in a skipped song, or appends the
+        shortest skipped song, whenever that brings the total closer to the target.
+        Time Complexity: O(n log n)
+        """
+        duration_index = sorted(candidates, key=lambda s: s.duration, reverse=True)
+
+        chosen = []
+        skipped = []  # Longest first; every skipped song is longer than the final gap
+        total = 0
+        for song in duration_index:
+            if total + song.duration <= target_duration:
+                chosen.append(song)
+                total += song.duration
+            else:
+                skipped.append(song)
+
+        gap = target_duration - total
+        if gap == 0 or not skipped:
+            return chosen
+
+        skipped.reverse()  # Shortest first so it can be searched with bisect
+        skipped_durations = [s.duration for s in skipped]
+
+        # Option 1: append the shortest skipped song (overshoots the target)
+        best_residual = gap
+        best_swap = None
+        if skipped_durations[0] - gap < best_residual:
+            best_residual = skipped_durations[0] - gap
+            best_swap = (None, 0)
+
+        # Option 2: replace a chosen song c with a skipped song u where u - c is close to the gap
+        for i, song in enumerate(chosen):
+            wanted = song.duration + gap
+            j = bisect_left(skipped_durations, wanted)
+            for k in (j - 1, j):
+                if 0 <= k < len(skipped_durations):
+                    residual = abs(gap - (skipped_durations[k] - song.duration))
+                    if residual < best_residual:
+                        best_residual = residual
+                        best_swap = (i, k)
+            if best_residual == 0:
+                break
+
+        if best_swap is not None:
+            chosen_index, skipped_index = best_swap
+            if chosen_index is None:
+                chosen.append(skipped[skipped_index])
+            else:
+                chosen[chosen_index] = skipped[skipped_index]
+        return chosen
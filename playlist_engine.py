@@ -1,4 +1,6 @@
 from node import Node
+from recency_filter import split_recent
+from itertools import islice
 import random
 
 class PlaylistEngine:
@@ -14,6 +16,10 @@ class PlaylistEngine:
         self.size = 0     # Number of songs in the playlist
         self.reversed = False  # Flag for lazy reversal of playlist order
         self.pinned_songs = {}  # Maps song_id to pinned position index
+        self.version = 0  # Incremented on every mutation so readers can detect changes
+        # Incremented only when songs are removed or reordered (not on appends at the tail),
+        # so readers can extend their derived data instead of rebuilding it
+        self.layout_version = 0
 
     def add_song(self, song):
         """
@@ -33,7 +39,43 @@ class PlaylistEngine:
                 self.head.prev = new_node
                 new_node.next = self.head
                 self.head = new_node
+                self.layout_version += 1  # Inserted before the head, not appended
         self.size += 1
+        self.version += 1
+
+    def extend(self, songs):
+        """
+        Adds many songs at once, with the same result as calling add_song for each.
+        Nodes are linked in a single pass and attached to the list in one step.
+        Time Complexity: O(k), k = number of songs added
+        """
+        if self.reversed:
+            for song in songs:
+                self.add_song(song)
+            return
+
+        first = last = None
+        count = 0
+        for song in songs:
+            node = Node(song)
+            if last is None:
+                first = node
+            else:
+                last.next = node
+                node.prev = last
+            last = node
+            count += 1
+        if first is None:
+            return
+
+        if self.tail:
+            self.tail.next = first
+            first.prev = self.tail
+        else:
+            self.head = first
+        self.tail = last
+        self.size += count
+        self.version += 1
 
     def delete_song(self, index):
         """
@@ -62,6 +104,8 @@ class PlaylistEngine:
             self.tail = node_to_delete.prev
 
         self.size -= 1
+        self.version += 1
+        self.layout_version += 1
         return True
 
     def move_song(self, from_index, to_index):
@@ -117,6 +161,8 @@ class PlaylistEngine:
             else:
                 self.tail = node_to_move
 
+        self.version += 1
+        self.layout_version += 1
         return True
 
     def reverse_playlist(self):
@@ -125,6 +171,7 @@ class PlaylistEngine:
         Time Complexity: O(1)
         """
         self.reversed = not self.reversed
+        self.version += 1
 
     def print_playlist(self):
         """
@@ -192,9 +239,10 @@ class PlaylistEngine:
         self.size = 0
         self.reversed = False
         self.pinned_songs = {}  # Clear all pins on rebuild
+        self.version += 1
+        self.layout_version += 1
 
-        for song in songs:
-            self.add_song(song)
+        self.extend(songs)
 
     def sort_playlist(self, criteria="title", ascending=True):
         """
@@ -233,6 +281,7 @@ class PlaylistEngine:
             print("Song ID does not match song at given index.")
             return False
         self.pinned_songs[song_id] = index
+        self.version += 1
         print(f"Pinned song '{node.song.title}' at position {index}.")
         return True
 
@@ -243,18 +292,30 @@ class PlaylistEngine:
         """
         if song_id in self.pinned_songs:
             del self.pinned_songs[song_id]
+            self.version += 1
             print(f"Unpinned song ID {song_id}.")
             return True
         print("Song ID not pinned.")
         return False
 
-    def shuffle_playlist_with_pins(self):
+    def shuffle_playlist_with_pins(self, recent_filter=None, recent_mode="demote"):
         """
         Shuffle playlist randomly but keep pinned songs fixed at their positions.
+
+        Args:
+            recent_filter (optional): Set-like recency filter (see recency_filter.py).
+                Recently played, unpinned songs are shuffled behind all other songs
+                (recent_mode="demote") or left out of the returned play order
+                (recent_mode="exclude").
+
+        Returns:
+            list: With recent_mode="exclude", the shuffled play order without the recent
+                  songs. The playlist itself is not modified in that mode, so no song is lost.
+                  None otherwise.
         """
         if self.size == 0:
             print("Playlist empty.")
-            return
+            return [] if recent_filter is not None and recent_mode == "exclude" else None
         
         # Convert playlist to list for easier manipulation
         all_songs = self.to_list()
@@ -267,7 +328,14 @@ class PlaylistEngine:
         songs_to_shuffle = [song for idx, song in enumerate(all_songs) if idx not in pinned_indices]
 
         # Shuffle the non-pinned songs randomly
-        random.shuffle(songs_to_shuffle)
+        recent = []
+        if recent_filter is None:
+            random.shuffle(songs_to_shuffle)
+        else:
+            fresh, recent = split_recent(songs_to_shuffle, recent_filter)
+            random.shuffle(fresh)
+            random.shuffle(recent)
+            songs_to_shuffle = fresh + recent
 
         # Rebuild the playlist merging pinned songs back in place
         new_order = []
@@ -281,5 +349,115 @@ class PlaylistEngine:
                 new_order.append(songs_to_shuffle[shuffle_idx])
                 shuffle_idx += 1
 
+        if recent_filter is not None and recent_mode == "exclude":
+            # Recent songs fill the last unpinned slots; drop those slots from the play order only
+            recent_start = len(songs_to_shuffle) - len(recent)
+            unpinned = (i for i in range(self.size) if i not in pinned_indices)
+            skipped = set(islice(unpinned, recent_start, None))
+            return [song for i, song in enumerate(new_order) if i not in skipped]
+
         self.from_list(new_order)
         print("Playlist shuffled with pinned songs fixed.")
+
+    # --- Set Operations ---
+
+    def union(self, other, key=None):
+        """
+        Returns a new playlist with the songs of this playlist followed by the songs
+        of the other playlist whose key is not present yet. Each key appears once.
+        Pins from both playlists are carried over (this playlist wins on conflicts).
+        Time Complexity: O(n + m)
+        """
+        key_func = self._song_key(key)
+        seen = set()
+        songs = []
+        for song in self.to_list() + other.to_list():
+            song_key = key_func(song)
+            if song_key not in seen:
+                seen.add(song_key)
+                songs.append(song)
+        return self._build_from(songs, [self, other])
+
+    def intersection(self, other, key=None):
+        """
+        Returns a new playlist with the songs of this playlist whose key is also
+        present in the other playlist, in this playlist's order. Each key appears once.
+        Time Complexity: O(n + m)
+        """
+        key_func = self._song_key(key)
+        other_keys = {key_func(song) for song in other.to_list()}
+        seen = set()
+        songs = []
+        for song in self.to_list():
+            song_key = key_func(song)
+            if song_key in other_keys and song_key not in seen:
+                seen.add(song_key)
+                songs.append(song)
+        return self._build_from(songs, [self])
+
+    def difference(self, other, key=None):
+        """
+        Returns a new playlist with the songs of this playlist whose key is not
+        present in the other playlist, in this playlist's order. Each key appears once.
+        Time Complexity: O(n + m)
+        """
+        key_func = self._song_key(key)
+        other_keys = {key_func(song) for song in other.to_list()}
+        seen = set()
+        songs = []
+        for song in self.to_list():
+            song_key = key_func(song)
+            if song_key not in other_keys and song_key not in seen:
+                seen.add(song_key)
+                songs.append(song)
+        return self._build_from(songs, [self])
+
+    def dedupe(self, key=None):
+        """
+        Returns a new playlist keeping only the first occurrence of each key.
+        key can be "id" (default), "title_artist" (normalized title and artist)
+        or any callable taking a song.
+        Time Complexity: O(n)
+        """
+        key_func = self._song_key(key)
+        seen = set()
+        songs = []
+        for song in self.to_list():
+            song_key = key_func(song)
+            if song_key not in seen:
+                seen.add(song_key)
+                songs.append(song)
+        return self._build_from(songs, [self])
+
+    @staticmethod
+    def _song_key(key):
+        """
+        Resolves a key name or callable into a function mapping a song to its identity.
+        """
+        if key is None or key == "id":
+            return lambda s: s.song_id
+        if key == "title_artist":
+            return lambda s: (" ".join(s.title.lower().split()),
+                              " ".join(s.artist.lower().split()))
+        if callable(key):
+            return key
+        print("Unknown key. Comparing songs by ID by default.")
+        return lambda s: s.song_id
+
+    @staticmethod
+    def _build_from(songs, pin_sources):
+        """
+        Builds a new playlist from existing Song objects (no copies are made).
+        A song pinned in any source playlist stays pinned at its new position.
+        Time Complexity: O(n)
+        """
+        new_playlist = PlaylistEngine()
+        pinned_ids = set()
+        for source in pin_sources:
+            pinned_ids.update(source.pinned_songs)
+
+        for index, song in enumerate(songs):
+            new_playlist.add_song(song)
+            if song.song_id in pinned_ids and song.song_id not in new_playlist.pinned_songs:
+                new_playlist.pinned_songs[song.song_id] = index
+        return new_playlist
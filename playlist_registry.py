@@ -0,0 +1,262 @@
+import sys
+import time
+from collections import OrderedDict
+
+from memory_accounting import instance_bytes
+from node import Node
+from playlist_engine import PlaylistEngine
+from playback_history import PlaybackHistory
+from rating_bst import RatingBST, BSTNode
+from song import Song
+
+
+def _instance_size(obj):
+    """
+    Bytes used by a single container object and its attribute dictionary.
+    Only used for a handful of objects per user; vars() can materialize a dict.
+    """
+    return sys.getsizeof(obj) + sys.getsizeof(vars(obj))
+
+
+class SongCatalog:
+    """
+    Interned song catalog shared by every user.
+    Each song ID is stored once; every playlist, history and rating bucket
+    references the same Song object.
+    """
+
+    def __init__(self):
+        self.songs = {}  # Maps song_id to the canonical Song object
+
+    def intern(self, song):
+        """
+        Return the canonical Song for song.song_id, registering song if it is new.
+        Time Complexity: O(1)
+        """
+        existing = self.songs.get(song.song_id)
+        if existing is None:
+            self.songs[song.song_id] = song
+            return song
+        return existing
+
+    def get(self, song_id):
+        """
+        Return the Song with this ID, or None.
+        """
+        return self.songs.get(song_id)
+
+    def __len__(self):
+        return len(self.songs)
+
+    def memory_bytes(self):
+        """
+        Bytes held by the catalog: the map, every Song and each distinct string once.
+        Time Complexity: O(n)
+        """
+        total = sys.getsizeof(self.songs)
+        song_bytes = instance_bytes(Song, lambda: Song(0, "", "", 0))
+        seen_strings = set()
+        for song in self.songs.values():
+            total += song_bytes
+            for value in (song.title, song.artist, song.genre):
+                if value is not None and id(value) not in seen_strings:
+                    seen_strings.add(id(value))
+                    total += sys.getsizeof(value)
+        return total
+
+
+class UserState:
+    """
+    Everything one user owns: named playlists, a playback history and a rating tree.
+    Songs are references into the shared SongCatalog.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.playlists = {}  # Maps playlist name to PlaylistEngine
+        self.history = PlaybackHistory()
+        self.rating_tree = RatingBST()
+        self.last_access = time.monotonic()
+
+    def playlist(self, name, create=True):
+        """
+        Return the named playlist, creating an empty one if needed (and allowed).
+        """
+        engine = self.playlists.get(name)
+        if engine is None and create:
+            engine = self.playlists[name] = PlaylistEngine()
+        return engine
+
+    def memory_bytes(self):
+        """
+        Bytes held by this user's structures, excluding the shared Song objects.
+        Time Complexity: O(p + b), p = number of playlists, b = rating buckets
+        """
+        node_bytes = instance_bytes(Node, lambda: Node(None))
+        # A sample BSTNode already includes an empty songs list; the real list is added per bucket
+        bst_node_bytes = instance_bytes(BSTNode, lambda: BSTNode(0)) - sys.getsizeof([])
+        total = _instance_size(self) + sys.getsizeof(self.playlists)
+        for engine in self.playlists.values():
+            total += _instance_size(engine) + engine.size * node_bytes
+            total += sys.getsizeof(engine.pinned_songs)
+        total += _instance_size(self.history) + sys.getsizeof(self.history.stack)
+        total += _instance_size(self.rating_tree)
+
+        def bucket_bytes(node):
+            if node is None:
+                return 0
+            return (bst_node_bytes + sys.getsizeof(node.songs) +
+                    bucket_bytes(node.left) + bucket_bytes(node.right))
+
+        return total + bucket_bytes(self.rating_tree.root)
+
+
+class PlaylistRegistry:
+    """
+    Manages many users, each with many playlists, on top of one interned SongCatalog.
+    Songs should enter through add_song, play and rate, which store the catalog's copy.
+    Users are loaded lazily on first access and the least recently used ones are
+    evicted once more than max_resident_users are in memory.
+    """
+
+    def __init__(self, catalog=None, max_resident_users=10000, loader=None, saver=None):
+        """
+        Args:
+            catalog (SongCatalog, optional): Shared catalog; a new one is created when omitted.
+            max_resident_users (int): Users kept in memory before LRU eviction starts.
+            loader (callable, optional): loader(user_id) -> UserState or None, for cold users.
+            saver (callable, optional): saver(user_state), called when a user is evicted.
+        """
+        self.catalog = catalog if catalog is not None else SongCatalog()
+        self.max_resident_users = max_resident_users
+        self.loader = loader
+        self.saver = saver
+        self.users = OrderedDict()  # Maps user_id to UserState, least recently used first
+
+    def get_user(self, user_id):
+        """
+        Return the user's state, loading it (or creating it) on first access.
+        Marks the user as most recently used and evicts over capacity.
+        Time Complexity: O(1) for resident users, O(size of the user) on load
+        """
+        state = self.users.get(user_id)
+        if state is not None:
+            self.users.move_to_end(user_id)
+        else:
+            state = self.loader(user_id) if self.loader else None
+            if state is None:
+                state = UserState(user_id)
+            else:
+                self._intern_user(state)
+            self.users[user_id] = state
+            while len(self.users) > self.max_resident_users:
+                self.evict(next(iter(self.users)))
+        state.last_access = time.monotonic()
+        return state
+
+    def get_playlist(self, user_id, name, create=True):
+        """
+        Return one of the user's playlists.
+        """
+        return self.get_user(user_id).playlist(name, create)
+
+    def add_song(self, user_id, playlist_name, song):
+        """
+        Add a song to a user's playlist through the catalog, so the stored
+        Song object is shared with every other user referencing the same ID.
+        """
+        song = self.catalog.intern(song)
+        self.get_playlist(user_id, playlist_name).add_song(song)
+        return song
+
+    def play(self, user_id, song):
+        """
+        Push a song onto the user's playback history through the catalog.
+        Returns the canonical Song that was recorded.
+        """
+        song = self.catalog.intern(song)
+        self.get_user(user_id).history.push_song(song)
+        return song
+
+    def rate(self, user_id, song, rating):
+        """
+        Set (or replace) the user's rating of a song, storing the catalog's copy.
+        Returns the canonical Song, or None if the rating is not between 1 and 5.
+        """
+        if rating < 1 or rating > 5:
+            print("Rating must be between 1 and 5.")
+            return None
+        song = self.catalog.intern(song)
+        rating_tree = self.get_user(user_id).rating_tree
+        rating_tree.delete_song(song.song_id)
+        rating_tree.insert_song(song, rating)
+        return song
+
+    def evict(self, user_id):
+        """
+        Drop a user from memory, handing it to the saver first.
+        Returns True if the user was resident.
+        """
+        state = self.users.pop(user_id, None)
+        if state is None:
+            return False
+        if self.saver:
+            self.saver(state)
+        return True
+
+    def evict_idle(self, max_idle_seconds):
+        """
+        Evict every user not accessed within max_idle_seconds.
+        Walks from the least recently used end and stops at the first active user.
+        Returns the number of evicted users.
+        """
+        cutoff = time.monotonic() - max_idle_seconds
+        evicted = 0
+        while self.users:
+            user_id, state = next(iter(self.users.items()))
+            if state.last_access > cutoff:
+                break
+            self.evict(user_id)
+            evicted += 1
+        return evicted
+
+    def memory_report(self):
+        """
+        Estimated memory use: the shared catalog once, plus each resident user's structures.
+
+        Returns:
+            dict: {'catalog_bytes': int, 'users_bytes': int, 'total_bytes': int,
+                   'resident_users': int, 'per_user_bytes': {user_id: int, ...}}
+        """
+        per_user = {user_id: state.memory_bytes() for user_id, state in self.users.items()}
+        catalog_bytes = self.catalog.memory_bytes()
+        users_bytes = sum(per_user.values())
+        return {
+            'catalog_bytes': catalog_bytes,
+            'users_bytes': users_bytes,
+            'total_bytes': catalog_bytes + users_bytes,
+            'resident_users': len(self.users),
+            'per_user_bytes': per_user
+        }
+
+    def _intern_user(self, state):
+        """
+        Replace every Song reference of a freshly loaded user with the catalog's copy.
+        Time Complexity: O(size of the user's playlists, history and ratings)
+        """
+        intern = self.catalog.intern
+        for engine in state.playlists.values():
+            current = engine.head
+            while current:
+                current.song = intern(current.song)
+                current = current.next
+        state.history.stack = [intern(song) for song in state.history.stack]
+
+        def intern_buckets(node):
+            if node is None:
+                return
+            node.songs = [intern(song) for song in node.songs]
+            intern_buckets(node.left)
+            intern_buckets(node.right)
+
+        intern_buckets(state.rating_tree.root)
@@ -1,5 +1,128 @@
+from array import array
+from bisect import bisect_left
 from collections import Counter
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the analytics mode falls back to the array module
+    np = None
+
+class SongColumns:
+    """
+    Column-oriented copy of a playlist used by the analytics mode.
+    Genres and artists are interned into integer codes, and the per-genre and
+    per-artist totals are kept up to date as songs are appended, so a playlist
+    that only grows at the tail never has to be re-read from the linked list.
+    """
+
+    def __init__(self):
+        self.durations = array('q')     # Song durations in seconds
+        self.genre_codes = array('q')   # Index into self.genres for every song
+        self.genres = []                # Distinct genre values (may include None)
+        self.artist_codes = array('q')  # Index into self.artists for every song
+        self.artists = []               # Distinct artist names
+        self.genre_index = {}           # Maps genre to its code
+        self.artist_index = {}          # Maps artist to its code
+        self.total = 0                  # Sum of all durations
+        # Per-code aggregates: int64 arrays with NumPy, lists otherwise
+        self.genre_counts = np.zeros(0, dtype=np.int64) if np is not None else []
+        self.genre_time = np.zeros(0, dtype=np.int64) if np is not None else []
+        self.artist_time = np.zeros(0, dtype=np.int64) if np is not None else []
+        self._ordered = None            # Sorted durations, built on demand by the array fallback
+
+    @classmethod
+    def from_playlist(cls, playlist):
+        """
+        Extract the columns with a single walk over the linked list.
+        Time Complexity: O(n)
+        """
+        songs = []
+        current = playlist.head
+        while current:
+            songs.append(current.song)
+            current = current.next
+        columns = cls()
+        columns.append_songs(songs)
+        return columns
+
+    def append_songs(self, songs):
+        """
+        Add songs at the end of the columns and fold them into the aggregates.
+        Time Complexity: O(k), k = number of songs added
+        """
+        # Each column is built by a C-level comprehension or map instead of per-song branching
+        durations = array('q', [song.duration for song in songs])
+        genre_codes = self._intern([song.genre for song in songs], self.genres, self.genre_index)
+        artist_codes = self._intern([song.artist for song in songs], self.artists, self.artist_index)
+        self.durations = self._extended(self.durations, durations)
+        self.genre_codes = self._extended(self.genre_codes, genre_codes)
+        self.artist_codes = self._extended(self.artist_codes, artist_codes)
+        self.total += sum(durations)
+
+        if np is not None:
+            # Zero-copy views over the new chunk; bincount does the group-bys in C
+            d = np.frombuffer(durations, dtype=np.int64)
+            g = np.frombuffer(genre_codes, dtype=np.int64)
+            a = np.frombuffer(artist_codes, dtype=np.int64)
+            self.genre_counts = self._grown(self.genre_counts, len(self.genres))
+            self.genre_time = self._grown(self.genre_time, len(self.genres))
+            self.artist_time = self._grown(self.artist_time, len(self.artists))
+            if len(d):
+                self.genre_counts += np.bincount(g, minlength=len(self.genres))
+                self.genre_time += np.rint(np.bincount(g, weights=d, minlength=len(self.genres))).astype(np.int64)
+                self.artist_time += np.rint(np.bincount(a, weights=d, minlength=len(self.artists))).astype(np.int64)
+        else:
+            self.genre_counts.extend([0] * (len(self.genres) - len(self.genre_counts)))
+            self.genre_time.extend([0] * (len(self.genres) - len(self.genre_time)))
+            self.artist_time.extend([0] * (len(self.artists) - len(self.artist_time)))
+            for code, count in Counter(genre_codes).items():
+                self.genre_counts[code] += count
+            for code, d in zip(genre_codes, durations):
+                self.genre_time[code] += d
+            for code, d in zip(artist_codes, durations):
+                self.artist_time[code] += d
+
+        if self._ordered is not None:
+            # Timsort merges the two sorted runs in linear time
+            self._ordered.extend(sorted(durations))
+            self._ordered.sort()
+
+    def ordered_durations(self):
+        """
+        Durations in ascending order, kept between calls.
+        Time Complexity: O(n log n) the first time, O(1) afterwards
+        """
+        if self._ordered is None:
+            self._ordered = sorted(self.durations)
+        return self._ordered
+
+    @staticmethod
+    def _intern(values, distinct, index):
+        for value in dict.fromkeys(values):
+            if value not in index:
+                index[value] = len(distinct)
+                distinct.append(value)
+        return array('q', map(index.__getitem__, values))
+
+    @staticmethod
+    def _extended(column, chunk):
+        try:
+            column.extend(chunk)
+        except BufferError:  # A NumPy view still holds the buffer; continue on a copy
+            column = array('q', column)
+            column.extend(chunk)
+        return column
+
+    @staticmethod
+    def _grown(values, length):
+        if len(values) < length:
+            values = np.concatenate([values, np.zeros(length - len(values), dtype=np.int64)])
+        return values
+
+    def __len__(self):
+        return len(self.durations)
+
+
 class PlaylistSummary:
     """
     Generates and prints summary statistics about a playlist.
@@ -13,6 +136,8 @@ class PlaylistSummary:
             playlist (PlaylistEngine): The playlist to summarize.
         """
         self.playlist = playlist
+        self._columns = None         # Cached SongColumns for the analytics mode
+        self._columns_layout = None  # Playlist layout_version the cached columns follow
 
     def generate_summary(self):
         """
@@ -51,6 +176,149 @@ class PlaylistSummary:
         }
         return summary
 
+    def get_columns(self):
+        """
+        Return the playlist as SongColumns. Songs appended at the tail are added
+        to the cached columns; pins and the lazy reverse flag leave them untouched.
+        Only removing or reordering songs forces a full re-extraction.
+        Time Complexity: O(k) for k appended songs, O(n) after a removal or reorder.
+        """
+        playlist = self.playlist
+        columns = self._columns
+        if (columns is None or self._columns_layout != playlist.layout_version
+                or len(columns) > playlist.size):
+            self._columns = SongColumns.from_playlist(playlist)
+            self._columns_layout = playlist.layout_version
+        elif len(columns) < playlist.size:
+            # Walk back from the tail over the new songs only
+            new_songs = []
+            current = playlist.tail
+            for _ in range(playlist.size - len(columns)):
+                new_songs.append(current.song)
+                current = current.prev
+            new_songs.reverse()
+            columns.append_songs(new_songs)
+        return self._columns
+
+    def generate_analytics(self, percentiles=(50, 90, 99), bins=10):
+        """
+        Analytics mode for large catalogs. Computes vectorized aggregates over
+        column arrays (NumPy when installed, the array module otherwise):
+        - Duration percentiles (linear interpolation, like numpy.percentile)
+        - Duration histogram with equal-width bins
+        - Per-genre and per-artist song counts and total playtime
+
+        Returns:
+            dict: {
+                'song_count': int,
+                'total_playtime': int,
+                'mean_duration': float,
+                'duration_percentiles': {percentile: seconds, ...},
+                'duration_histogram': {'edges': [...], 'counts': [...]},
+                'genre_distribution': {genre: count, ...},
+                'genre_playtime': {genre: seconds, ...},
+                'artist_count': int,
+                'artist_playtime': {artist: seconds, ...}
+            }
+
+        The first call reads the whole playlist (about as slow as generate_summary's
+        loop). The speedup comes from repeat calls: the columns and group-by totals
+        are cached and extended in place as songs are appended.
+
+        Time Complexity: O(n) on the first call or after a removal/reorder;
+        afterwards O(k) for k appended songs plus the percentile/histogram pass
+        (O(n) with NumPy, O(bins log n) in the array fallback) and the output dicts.
+        """
+        columns = self.get_columns()
+        if np is not None:
+            return self._analytics_numpy(columns, percentiles, bins)
+        return self._analytics_array(columns, percentiles, bins)
+
+    def _analytics_numpy(self, columns, percentiles, bins):
+        """
+        NumPy implementation of generate_analytics.
+        """
+        durations = np.frombuffer(columns.durations, dtype=np.int64)
+        count = len(durations)
+        if count == 0:
+            return self._empty_analytics(percentiles)
+
+        total = columns.total
+        percentile_values = np.percentile(durations, list(percentiles))
+        hist_counts, hist_edges = np.histogram(durations, bins=bins)
+
+        return {
+            'song_count': count,
+            'total_playtime': total,
+            'mean_duration': total / count,
+            'duration_percentiles': {p: float(v) for p, v in zip(percentiles, percentile_values)},
+            'duration_histogram': {'edges': [float(e) for e in hist_edges],
+                                   'counts': [int(c) for c in hist_counts]},
+            'genre_distribution': dict(zip(columns.genres, columns.genre_counts.tolist())),
+            'genre_playtime': dict(zip(columns.genres, columns.genre_time.tolist())),
+            'artist_count': len(columns.artists),
+            'artist_playtime': dict(zip(columns.artists, columns.artist_time.tolist())),
+        }
+
+    def _analytics_array(self, columns, percentiles, bins):
+        """
+        Pure-Python fallback for generate_analytics when NumPy is not installed.
+        """
+        durations = columns.durations
+        count = len(durations)
+        if count == 0:
+            return self._empty_analytics(percentiles)
+
+        total = columns.total
+        ordered = columns.ordered_durations()
+        percentile_values = {}
+        for p in percentiles:
+            # Same linear interpolation rule as numpy.percentile
+            rank = (count - 1) * p / 100
+            low = int(rank)
+            high = min(low + 1, count - 1)
+            percentile_values[p] = ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+        low_edge, high_edge = ordered[0], ordered[-1]
+        if low_edge == high_edge:
+            low_edge, high_edge = low_edge - 0.5, high_edge + 0.5
+        width = (high_edge - low_edge) / bins
+        # The bin of a duration only grows with it, so each bin boundary in the
+        # sorted durations is found by binary search instead of visiting every song
+        bin_of = lambda d: min(int((d - low_edge) / width), bins - 1)
+        starts = [bisect_left(ordered, b, key=bin_of) for b in range(bins)] + [count]
+        hist_counts = [starts[b + 1] - starts[b] for b in range(bins)]
+
+        return {
+            'song_count': count,
+            'total_playtime': total,
+            'mean_duration': total / count,
+            'duration_percentiles': {p: float(v) for p, v in percentile_values.items()},
+            'duration_histogram': {'edges': [low_edge + width * i for i in range(bins + 1)],
+                                   'counts': hist_counts},
+            'genre_distribution': dict(zip(columns.genres, columns.genre_counts)),
+            'genre_playtime': dict(zip(columns.genres, columns.genre_time)),
+            'artist_count': len(columns.artists),
+            'artist_playtime': dict(zip(columns.artists, columns.artist_time)),
+        }
+
+    @staticmethod
+    def _empty_analytics(percentiles):
+        """
+        Analytics result for an empty playlist.
+        """
+        return {
+            'song_count': 0,
+            'total_playtime': 0,
+            'mean_duration': 0.0,
+            'duration_percentiles': {p: 0.0 for p in percentiles},
+            'duration_histogram': {'edges': [], 'counts': []},
+            'genre_distribution': {},
+            'genre_playtime': {},
+            'artist_count': 0,
+            'artist_playtime': {},
+        }
+
     def print_summary(self):
         """
         Print the generated summary in a user-friendly format.
@@ -67,3 +335,25 @@ class PlaylistSummary:
 
         print(f"Total Playtime: {summary['total_playtime']} seconds")
         print(f"Unique Artists: {summary['artist_count']}")
+
+    def print_analytics(self, top=5):
+        """
+        Print the analytics-mode aggregates, limiting per-artist output to the top entries.
+        """
+        analytics = self.generate_analytics()
+        print("\n--- Playlist Analytics ---")
+        print(f"Songs: {analytics['song_count']}")
+        print(f"Total Playtime: {analytics['total_playtime']} seconds")
+        print(f"Mean Duration: {analytics['mean_duration']:.1f} seconds")
+        for p, value in analytics['duration_percentiles'].items():
+            print(f"  p{p}: {value:.1f} seconds")
+
+        print("Playtime by Genre:")
+        for genre, seconds in analytics['genre_playtime'].items():
+            label = genre if genre is not None else "Unknown"
+            print(f"  {label}: {seconds} seconds ({analytics['genre_distribution'][genre]} song(s))")
+
+        print(f"Top {top} Artists by Playtime:")
+        ranked = sorted(analytics['artist_playtime'].items(), key=lambda item: item[1], reverse=True)
+        for artist, seconds in ranked[:top]:
+            print(f"  {artist}: {seconds} seconds")
@@ -0,0 +1,413 @@
+import asyncio
+import contextlib
+import io
+import json
+from urllib.parse import urlsplit, parse_qs
+
+from playlist_engine import PlaylistEngine
+from playback_history import PlaybackHistory
+from rating_bst import RatingBST
+from song import Song
+from song_lookup import SongLookup
+from system_snapshot import SystemSnapshot
+
+MAX_BODY_BYTES = 1 << 20  # Largest accepted request body
+PIPELINE_DEPTH = 64       # Requests read ahead per connection before reading pauses
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    """
+    Error returned to the client as a JSON body with the given HTTP status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SerialExecutor:
+    """
+    Runs submitted edits one at a time through an asyncio queue.
+    One executor exists per playlist (plus one for ratings and one for history),
+    so edits to the same structure are serialized while different playlists proceed independently.
+
+    Limitation: each edit runs synchronously on the event loop, because reads access
+    the structures directly and must never observe an edit half-way. An O(n) edit
+    (move_song, delete_song, sort, shuffle on a large playlist) therefore blocks every
+    other request, including reads of other playlists, until it finishes.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, func):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((func, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            func, future = await self.queue.get()
+            try:
+                result = func()
+            except Exception as error:  # Handed back to the waiting request
+                if not future.cancelled():
+                    future.set_exception(error)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    def close(self):
+        self.task.cancel()
+
+
+class PlayWiseService:
+    """
+    JSON operations over the PlayWise structures: named playlists, one shared
+    song lookup (the catalog), the rating tree and the playback history.
+    Reads run directly; edits go through the SerialExecutor of the structure they touch.
+    """
+
+    def __init__(self):
+        self.playlists = {}  # Maps playlist name to PlaylistEngine
+        self.lookup = SongLookup()
+        self.rating_tree = RatingBST()
+        self.history = PlaybackHistory()
+        self._executors = {}  # Maps "playlist:<name>", "ratings" or "history" to a SerialExecutor
+        self._snapshots = {}  # Maps playlist name to its SystemSnapshot, so version tokens stay valid
+
+    async def handle(self, method, path, query, body):
+        """
+        Route one request. Returns a JSON-serializable result or raises ApiError.
+        """
+        parts = [part for part in path.split("/") if part]
+        if not parts:
+            raise ApiError(404, "Unknown route.")
+
+        if parts[0] == "playlists":
+            if len(parts) == 1 and method == "GET":
+                return {name: engine.size for name, engine in self.playlists.items()}
+            if len(parts) >= 2:
+                return await self._playlist_route(method, parts[1], parts[2:], query, body)
+        elif parts[0] == "songs" and method == "GET":
+            if len(parts) == 2:
+                song = self.lookup.search_by_id(self._int(parts[1], "song_id"))
+                if song is None:
+                    raise ApiError(404, "Song not found.")
+                return song.to_dict()
+            if len(parts) == 1 and "title" in query:
+                return [song.to_dict() for song in self.lookup.search_by_title(query["title"])]
+        elif parts[0] == "ratings":
+            if len(parts) == 1 and method == "POST":
+                song = self._known_song(body.get("song_id"))
+                rating = self._int(body.get("rating"), "rating")
+                if not 1 <= rating <= 5:
+                    raise ApiError(400, "rating must be between 1 and 5.")
+                return await self._edit("ratings", lambda: self._rate(song, rating))
+            if len(parts) == 2 and method == "GET":
+                rating = self._int(parts[1], "rating")
+                return [song.to_dict() for song in self.rating_tree.search_by_rating(rating)]
+        elif parts[0] == "history":
+            if len(parts) == 1 and method == "GET":
+                limit = self._int(query.get("limit", 20), "limit")
+                return [song.to_dict() for song in self.history.stack[-limit:][::-1]] if limit > 0 else []
+            if len(parts) == 1 and method == "POST":
+                song = self._known_song(body.get("song_id"))
+                return await self._edit("history", lambda: self.history.push_song(song))
+            if parts[1:] == ["undo"] and method == "POST":
+                # An empty history makes undo return None, reported as a 409 Conflict
+                return await self._edit("history", lambda: self.history.undo_last_play() or False)
+        raise ApiError(404, "Unknown route.")
+
+    async def _playlist_route(self, method, name, rest, query, body):
+        if method == "GET" and not rest:
+            engine = self._playlist(name)
+            offset = self._int(query.get("offset", 0), "offset")
+            limit = self._int(query.get("limit", 100), "limit")
+            # Walk only offset + limit nodes instead of materializing the whole playlist
+            page = []
+            current = engine.tail if engine.reversed else engine.head
+            index = 0
+            while current and index < offset + limit:
+                if index >= offset:
+                    page.append(current.song.to_dict())
+                current = current.prev if engine.reversed else current.next
+                index += 1
+            return {"size": engine.size, "reversed": engine.reversed,
+                    "pinned": engine.pinned_songs, "songs": page}
+        if method == "GET" and rest == ["snapshot"]:
+            engine = self._playlist(name)
+            snapshot = self._snapshots.get(name)
+            if snapshot is None or snapshot.playlist_engine is not engine:
+                snapshot = self._snapshots[name] = SystemSnapshot(engine, self.history, self.rating_tree)
+            return snapshot.export_delta(query.get("since"))
+
+        if method == "POST" and rest == ["songs"]:
+            song = self._song_from_body(body)
+            engine = self.playlists.get(name) or self.playlists.setdefault(name, PlaylistEngine())
+            return await self._edit("playlist:" + name, lambda: self._add(engine, song))
+        if method == "DELETE" and len(rest) == 2 and rest[0] == "songs":
+            engine = self._playlist(name)
+            index = self._int(rest[1], "index")
+            return await self._edit("playlist:" + name, lambda: engine.delete_song(index))
+        if method == "POST" and len(rest) == 1:
+            engine = self._playlist(name)
+            action = rest[0]
+            if action == "move":
+                args = (self._int(body.get("from_index"), "from_index"), self._int(body.get("to_index"), "to_index"))
+                func = lambda: engine.move_song(*args)
+            elif action == "pin":
+                args = (self._int(body.get("song_id"), "song_id"), self._int(body.get("index"), "index"))
+                func = lambda: engine.pin_song(*args)
+            elif action == "unpin":
+                song_id = self._int(body.get("song_id"), "song_id")
+                func = lambda: engine.unpin_song(song_id)
+            elif action == "sort":
+                criteria = body.get("criteria", "title")
+                ascending = bool(body.get("ascending", True))
+                func = lambda: engine.sort_playlist(criteria, ascending)
+            elif action == "shuffle":
+                func = engine.shuffle_playlist_with_pins
+            elif action == "reverse":
+                func = engine.reverse_playlist
+            else:
+                raise ApiError(404, "Unknown playlist action.")
+            return await self._edit("playlist:" + name, func)
+        raise ApiError(405 if method not in ("GET", "POST", "DELETE") else 404, "Unknown route.")
+
+    async def _edit(self, key, func):
+        """
+        Run an edit on the structure's serial queue. Text the engine prints is returned
+        as the response message; a False return value becomes a 409 Conflict.
+        """
+        executor = self._executors.get(key)
+        if executor is None:
+            executor = self._executors[key] = SerialExecutor()
+
+        def run():
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                result = func()
+            return result, output.getvalue().strip()
+
+        result, message = await executor.submit(run)
+        if result is False:
+            raise ApiError(409, message or "Operation rejected.")
+        if isinstance(result, Song):
+            return result
+        return {"ok": True, "message": message} if message else {"ok": True}
+
+    def _add(self, engine, song):
+        engine.add_song(song)
+        if self.lookup.search_by_id(song.song_id) is None:
+            self.lookup.add_song(song)
+        return True
+
+    def _rate(self, song, rating):
+        self.rating_tree.delete_song(song.song_id)
+        self.rating_tree.insert_song(song, rating)
+        return True
+
+    def _playlist(self, name):
+        engine = self.playlists.get(name)
+        if engine is None:
+            raise ApiError(404, f"Playlist '{name}' not found.")
+        return engine
+
+    def _known_song(self, song_id):
+        song = self.lookup.search_by_id(self._int(song_id, "song_id"))
+        if song is None:
+            raise ApiError(404, "Song not found.")
+        return song
+
+    def _song_from_body(self, body):
+        """
+        A body with only song_id refers to a catalog song; a full body creates one.
+        """
+        song_id = self._int(body.get("song_id"), "song_id")
+        existing = self.lookup.search_by_id(song_id)
+        if existing is not None:
+            return existing
+        title, artist = body.get("title"), body.get("artist")
+        if not isinstance(title, str) or not isinstance(artist, str):
+            raise ApiError(404, "Song not found; provide title, artist and duration to create it.")
+        return Song(song_id, title, artist, self._int(body.get("duration"), "duration"), body.get("genre"))
+
+    @staticmethod
+    def _int(value, name):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"{name} must be an integer.")
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.close()
+
+
+class PlayWiseServer:
+    """
+    Minimal HTTP/1.1 JSON server on asyncio streams (standard library only).
+    Connections are kept alive and pipelined: requests are read back to back and
+    handled one at a time in request order, so a request always sees the effect of
+    earlier requests on the same connection. Different connections run concurrently.
+    At most PIPELINE_DEPTH requests are read ahead per connection.
+    """
+
+    def __init__(self, service=None, host="127.0.0.1", port=8080):
+        self.service = service if service is not None else PlayWiseService()
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # Resolves port 0
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _connection(self, reader, writer):
+        # Requests read ahead but not answered yet, in order. Bounded, so a client that
+        # pipelines without reading responses stalls its own reader instead of growing the queue.
+        requests = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+        sender = asyncio.get_running_loop().create_task(self._send_responses(requests, writer))
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if not await self._enqueue(requests, (method, target, body), sender):
+                    break
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ApiError as error:
+            await self._enqueue(requests, error, sender)
+        finally:
+            await self._enqueue(requests, None, sender)
+            await sender
+
+    @staticmethod
+    async def _enqueue(requests, item, sender):
+        """
+        Put an item on the bounded request queue, giving up if the sender has stopped
+        (the client went away), since nobody would ever take it off a full queue.
+        Returns True if the item was queued.
+        """
+        if sender.done():
+            return False
+        put = asyncio.get_running_loop().create_task(requests.put(item))
+        await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            return False
+        return True
+
+    async def _read_request(self, reader):
+        """
+        Read one request from the stream. Returns None at end of stream.
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ApiError(400, "Malformed request line.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise ApiError(400, "Content-Length must be an integer.")
+        if length < 0:
+            raise ApiError(400, "Content-Length must not be negative.")
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _respond(self, method, target, body):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise ApiError(400, "Request body must be a JSON object.")
+            result = await self.service.handle(method, url.path, query, payload)
+            if isinstance(result, Song):
+                result = result.to_dict()
+            return 200, result
+        except ApiError as error:
+            return error.status, {"error": error.message}
+        except json.JSONDecodeError:
+            return 400, {"error": "Request body is not valid JSON."}
+        except Exception as error:
+            return 500, {"error": str(error)}
+
+    async def _send_responses(self, requests, writer):
+        """
+        Answer queued requests strictly one after another; each is awaited before the next starts.
+        Responses are flushed once per burst, or as soon as the transport buffer passes its
+        high-water mark, so a client that does not read its responses stops being served.
+        """
+        transport = writer.transport
+        _, high_water = transport.get_write_buffer_limits()
+        try:
+            while True:
+                request = await requests.get()
+                if request is None:
+                    break
+                if isinstance(request, ApiError):  # The connection could not be read any further
+                    status, result = request.status, {"error": request.message}
+                else:
+                    status, result = await self._respond(*request)
+                data = json.dumps(result).encode("utf-8")
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n" % (status, REASONS.get(status, "").encode(), len(data)))
+                writer.write(data)
+                if requests.empty() or transport.get_write_buffer_size() > high_water:
+                    await writer.drain()  # Waits while the client is not reading
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    """
+    Command line entry point: python playwise_server.py [--host HOST] [--port PORT]
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve PlayWise over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    server = PlayWiseServer(host=args.host, port=args.port)
+    print(f"PlayWise server listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
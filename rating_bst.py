@@ -17,6 +17,7 @@ class RatingBST:
 
     def __init__(self):
         self.root = None
+        self.version = 0  # Incremented on every insert or delete so readers can detect changes
 
     def insert_song(self, song, rating):
         """
@@ -29,6 +30,29 @@ class RatingBST:
             # Skip inserting unrated songs
             return
         self.root = self._insert(self.root, song, rating)
+        self.version += 1
+
+    def insert_songs(self, rated_songs):
+        """
+        Insert many (song, rating) pairs at once. Pairs are grouped by rating first,
+        so the tree is searched once per rating bucket instead of once per song.
+        Unrated pairs (rating None) are skipped.
+
+        Time Complexity: O(k + b * h), k = number of pairs, b = distinct ratings
+        """
+        groups = {}
+        for song, rating in rated_songs:
+            if rating is not None:
+                groups.setdefault(rating, []).append(song)
+        for rating, songs in groups.items():
+            node = self._search(self.root, rating)
+            if node is None:
+                self.root = self._insert(self.root, songs[0], rating)
+                node = self._search(self.root, rating)
+                songs = songs[1:]
+            node.songs.extend(songs)
+        if groups:
+            self.version += 1
 
     def _insert(self, node, song, rating):
         """
@@ -58,6 +82,29 @@ class RatingBST:
             return node.songs
         return []
 
+    def search_by_rating_range(self, min_rating, max_rating):
+        """
+        Return all songs whose rating lies between min_rating and max_rating (inclusive),
+        ordered from the highest rating bucket to the lowest.
+        Subtrees outside the range are pruned during the traversal.
+
+        Time Complexity: O(h + k), k = number of songs returned
+        """
+        songs = []
+
+        def reverse_inorder(node):
+            if node is None:
+                return
+            if node.rating < max_rating:
+                reverse_inorder(node.right)
+            if min_rating <= node.rating <= max_rating:
+                songs.extend(node.songs)
+            if node.rating > min_rating:
+                reverse_inorder(node.left)
+
+        reverse_inorder(self.root)
+        return songs
+
     def _search(self, node, rating):
         """
         Recursive BST search by rating.
@@ -77,6 +124,7 @@ class RatingBST:
         Removes the rating bucket node if no songs remain in that bucket.
         """
         self.root = self._delete_song(self.root, song_id)
+        self.version += 1
 
     def _delete_song(self, node, song_id):
         """
@@ -85,6 +133,10 @@ class RatingBST:
         if node is None:
             return None
 
+        # The song can sit in any bucket, so clean both subtrees first
+        node.left = self._delete_song(node.left, song_id)
+        node.right = self._delete_song(node.right, song_id)
+
         # Remove song from current node's list
         node.songs = [s for s in node.songs if s.song_id != song_id]
 
@@ -102,7 +154,6 @@ class RatingBST:
             node.right = self._delete_node(node.right, successor.rating)
         else:
             # Songs remain, keep the node
-            # Since deletion is by song_id, this part is a safe fallback; no further traversal needed.
             pass
 
         return node
@@ -0,0 +1,145 @@
+import hashlib
+import math
+import time
+from collections import deque
+
+
+class RecentlyPlayedSet:
+    """
+    Exact time-windowed set of recently played song IDs.
+    Remembers the last play time of every song heard within the window;
+    older plays are expired lazily as new ones are recorded.
+    Memory grows with the number of plays inside the window.
+    """
+
+    def __init__(self, window_seconds=3 * 3600, clock=time.monotonic):
+        """
+        Args:
+            window_seconds (float): How long a play keeps a song "recent".
+            clock (callable): Time source, in seconds.
+        """
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self.last_played = {}  # Maps song_id to the time it was last played
+        self.plays = deque()   # (time, song_id) in play order, oldest first
+
+    def record(self, song_id, now=None):
+        """
+        Mark a song as played now.
+        Time Complexity: O(1) amortized
+        """
+        now = self.clock() if now is None else now
+        self.last_played[song_id] = now
+        self.plays.append((now, song_id))
+        self._expire(now)
+
+    def __contains__(self, song_id):
+        """
+        True if the song was played within the window.
+        Time Complexity: O(1)
+        """
+        played_at = self.last_played.get(song_id)
+        return played_at is not None and played_at >= self.clock() - self.window_seconds
+
+    def __len__(self):
+        self._expire(self.clock())
+        return len(self.last_played)
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        while self.plays and self.plays[0][0] < cutoff:
+            played_at, song_id = self.plays.popleft()
+            if self.last_played.get(song_id) == played_at:  # Not replayed since
+                del self.last_played[song_id]
+
+
+class RotatingBloomFilter:
+    """
+    Approximate time-windowed set for very long histories, in fixed memory.
+
+    Plays go into the newest of several Bloom filter generations; the oldest
+    generation is dropped every window / (generations - 1) seconds, so a song
+    stays "recent" for at least window_seconds and at most one extra generation
+    span. A generation also rotates early once it holds capacity songs, which keeps
+    the false-positive rate of a lookup (over all generations) below fp_rate,
+    at the cost of a shorter memory under very heavy play rates.
+    There are no false negatives within the window otherwise.
+    """
+
+    def __init__(self, window_seconds=3 * 3600, capacity=100000, fp_rate=0.01,
+                 generations=4, clock=time.monotonic):
+        """
+        Args:
+            window_seconds (float): How long a play keeps a song "recent".
+            capacity (int): Songs per generation before it rotates early.
+            fp_rate (float): Upper bound on the false-positive rate of a lookup.
+            generations (int): Number of filters kept (at least 2).
+            clock (callable): Time source, in seconds.
+        """
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.generations = max(2, generations)
+        self.clock = clock
+        self.span = window_seconds / (self.generations - 1)  # Lifetime of one generation
+
+        # Each generation gets fp_rate / generations, so the union stays within fp_rate
+        per_filter = fp_rate / self.generations
+        self.bits = max(8, int(math.ceil(-capacity * math.log(per_filter) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+
+        self.filters = deque()  # (start time, bit array, count), oldest first
+        self._rotate(self.clock())
+
+    def record(self, song_id, now=None):
+        """
+        Mark a song as played now.
+        Time Complexity: O(k), k = number of hash functions
+        """
+        now = self.clock() if now is None else now
+        started, bits, count = self.filters[-1]
+        if now - started >= self.span or count >= self.capacity:
+            self._rotate(now)
+            started, bits, count = self.filters[-1]
+        for position in self._positions(song_id):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.filters[-1] = (started, bits, count + 1)
+
+    def __contains__(self, song_id):
+        """
+        True if the song was (probably) played within the window.
+        Time Complexity: O(k * g), g = generations
+        """
+        positions = self._positions(song_id)
+        cutoff = self.clock() - self.window_seconds - self.span
+        for started, bits, _ in self.filters:
+            if started < cutoff:
+                continue  # Expired generation that has not been rotated out yet
+            if all(bits[position >> 3] & (1 << (position & 7)) for position in positions):
+                return True
+        return False
+
+    def _rotate(self, now):
+        self.filters.append((now, bytearray((self.bits + 7) // 8), 0))
+        while len(self.filters) > self.generations:
+            self.filters.popleft()
+
+    def _positions(self, song_id):
+        """
+        Bit positions for a song ID, by double hashing one 128-bit digest.
+        """
+        digest = hashlib.blake2b(str(song_id).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+
+def split_recent(songs, recent_filter):
+    """
+    Split songs into (fresh, recent) lists, keeping their order.
+    Time Complexity: O(n), one O(1) filter check per song
+    """
+    fresh = []
+    recent = []
+    for song in songs:
+        (recent if song.song_id in recent_filter else fresh).append(song)
+    return fresh, recent
@@ -0,0 +1,207 @@
+import heapq
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+
+from system_snapshot import SystemSnapshot
+
+NULL_OFFSET = -1  # Offset marking a None value in an encoded string column
+
+
+def _encode_strings(values):
+    """
+    Pack a list of strings (or None) into one UTF-8 buffer plus an array of
+    end offsets, so a shard crosses the process boundary as two flat buffers.
+    """
+    text = "".join(value for value in values if value is not None)
+    ends = accumulate(len(value) if value is not None else 0 for value in values)
+    offsets = array('q', (end if value is not None else NULL_OFFSET for end, value in zip(ends, values)))
+    return text.encode("utf-8"), offsets.tobytes()
+
+
+def _decode_strings(blob, offset_bytes):
+    """
+    Inverse of _encode_strings.
+    """
+    text = blob.decode("utf-8")
+    offsets = array('q')
+    offsets.frombytes(offset_bytes)
+    values = []
+    start = 0
+    for end in offsets:
+        if end == NULL_OFFSET:
+            values.append(None)
+        else:
+            values.append(text[start:end])
+            start = end
+    return values
+
+
+def _decode_ints(data):
+    values = array('q')
+    values.frombytes(data)
+    return values
+
+
+def _sort_shard(kind, column, start, descending):
+    """
+    Worker: stably sort one shard and return its global positions as packed int64.
+    """
+    keys = _decode_strings(*column) if kind == "str" else _decode_ints(column)
+    order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+    return array('q', (start + i for i in order)).tobytes()
+
+
+def _summarize_shard(durations, genres, artists):
+    """
+    Worker: partial summary of one shard.
+    Returns (genre counts in first-seen order, total playtime, distinct artists in first-seen order).
+    """
+    genre_counts = list(Counter(_decode_strings(*genres)).items())
+    artist_names = list(dict.fromkeys(_decode_strings(*artists)))
+    return genre_counts, sum(_decode_ints(durations)), _encode_strings(artist_names)
+
+
+def _top_shard(durations, start, k):
+    """
+    Worker: global positions of the k longest songs of one shard, longest first
+    (ties keep playlist order, like heapq.nlargest).
+    """
+    values = _decode_ints(durations)
+    top = heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+    return array('q', (start + i for i in top)).tobytes()
+
+
+class ShardedExecutor:
+    """
+    Runs sort_playlist, PlaylistSummary.generate_summary and the snapshot top-K
+    over shards of the playlist in a process pool.
+
+    The parent walks the linked list once, ships each shard as compact column
+    buffers (int64 arrays and UTF-8 string blobs, never pickled Song objects),
+    and k-way merges the per-shard results. Every shard is a contiguous range
+    in playlist order and every merge is stable, so the output is identical
+    to the serial methods. Playlists smaller than min_parallel run serially.
+    """
+
+    def __init__(self, workers=None, min_parallel=50000):
+        """
+        Args:
+            workers (int, optional): Worker processes (default: CPU count).
+            min_parallel (int): Smallest playlist worth sharding.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel = min_parallel
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Shut the worker pool down.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _map(self, func, *iterables):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._pool.map(func, *iterables))
+
+    def _bounds(self, n):
+        shards = min(self.workers, n) or 1
+        return [(n * i // shards, n * (i + 1) // shards) for i in range(shards)]
+
+    def _serial(self, playlist):
+        return playlist.size < self.min_parallel
+
+    def sort_playlist(self, playlist, criteria="title", ascending=True):
+        """
+        Same result as playlist.sort_playlist(criteria, ascending).
+        Time Complexity: O(n log n / w + n log w), w = workers
+        """
+        if self._serial(playlist):
+            return playlist.sort_playlist(criteria, ascending)
+
+        songs = playlist.to_list()
+        if criteria == "duration":
+            keys = [song.duration for song in songs]
+        elif criteria == "recent":
+            keys = [song.song_id for song in songs]
+        else:
+            if criteria != "title":
+                print("Unknown sorting criteria. Sorting by title by default.")
+            keys = [song.title.lower() for song in songs]
+
+        bounds = self._bounds(len(songs))
+        if criteria in ("duration", "recent"):
+            kind = "int"
+            columns = [array('q', keys[start:end]).tobytes() for start, end in bounds]
+        else:
+            kind = "str"
+            columns = [_encode_strings(keys[start:end]) for start, end in bounds]
+        descending = not ascending
+        runs = self._map(_sort_shard, [kind] * len(bounds), columns,
+                         [start for start, _ in bounds], [descending] * len(bounds))
+
+        # k-way merge: Timsort detects the w presorted runs and merges them in C,
+        # which beats heapq.merge's per-item Python loop. The sort is stable and the
+        # runs are concatenated in shard order, so equal keys keep playlist order.
+        merged = [i for run in runs for i in _decode_ints(run)]
+        merged.sort(key=keys.__getitem__, reverse=descending)
+        playlist.from_list([songs[i] for i in merged])
+
+    def generate_summary(self, summary):
+        """
+        Same result as summary.generate_summary() for a PlaylistSummary.
+        Time Complexity: O(n / w + g * w + a), g = genres, a = distinct artists
+        """
+        playlist = summary.playlist
+        if self._serial(playlist):
+            return summary.generate_summary()
+
+        songs = playlist.to_list()
+        bounds = self._bounds(len(songs))
+        partials = self._map(
+            _summarize_shard,
+            [array('q', (song.duration for song in songs[start:end])).tobytes() for start, end in bounds],
+            [_encode_strings([song.genre for song in songs[start:end]]) for start, end in bounds],
+            [_encode_strings([song.artist for song in songs[start:end]]) for start, end in bounds])
+
+        genre_counter = Counter()
+        artist_set = set()
+        total_playtime = 0
+        for genre_counts, playtime, artists in partials:
+            for genre, count in genre_counts:  # Shard order keeps first-seen genre order
+                genre_counter[genre] += count
+            total_playtime += playtime
+            artist_set.update(_decode_strings(*artists))
+        return {
+            'genre_distribution': dict(genre_counter),
+            'total_playtime': total_playtime,
+            'artist_count': len(artist_set)
+        }
+
+    def top_longest_songs(self, playlist, k=SystemSnapshot.TOP_N):
+        """
+        Same result as the 'top_5_longest_songs' snapshot section (for k=5).
+        Time Complexity: O(n / w * log k + w * k)
+        """
+        songs = playlist.to_list()
+        if self._serial(playlist):
+            return heapq.nlargest(k, songs, key=lambda s: s.duration)
+
+        durations = array('q', (song.duration for song in songs))
+        bounds = self._bounds(len(songs))
+        runs = self._map(_top_shard, [durations[start:end].tobytes() for start, end in bounds],
+                         [start for start, _ in bounds], [k] * len(bounds))
+        # Candidates arrive in shard order, so ties still resolve to the earliest song
+        candidates = [i for run in runs for i in _decode_ints(run)]
+        return [songs[i] for i in heapq.nlargest(k, candidates, key=durations.__getitem__)]
@@ -1,9 +1,11 @@
-class SnapshotModule:
+from system_snapshot import SystemSnapshot
+
+class SnapshotModule(SystemSnapshot):
     """
-    Aggregates and exports a snapshot summary of the current system state:
-    - Playlist details
-    - Playback history
-    - Rating distribution
+    Legacy snapshot interface kept for existing callers.
+    All aggregation and streaming now lives in SystemSnapshot; this class only
+    reshapes the result into the original format (songs as small dictionaries,
+    'most_recently_played' key, and only the rating buckets that exist).
     """
 
     def __init__(self, playlist_engine, playback_history, rating_tree):
@@ -13,8 +15,7 @@ class SnapshotModule:
         playback_history: PlaybackHistory instance
         rating_tree: RatingBST instance
         """
-        self.playlist_engine = playlist_engine
-        self.playback_history = playback_history
+        super().__init__(playlist_engine, playback_history, rating_tree)
         self.rating_tree = rating_tree
 
     def export_snapshot(self):
@@ -27,33 +28,15 @@ class SnapshotModule:
         Returns:
             dict: Snapshot data
         """
-        snapshot = {}
-
-        # 1. Get all songs from playlist, sort descending by duration, pick top 5
-        songs = self.playlist_engine.to_list()
-        sorted_by_duration = sorted(songs, key=lambda s: s.duration, reverse=True)
-        snapshot['top_5_longest_songs'] = [
-            {'title': s.title, 'artist': s.artist, 'duration': s.duration} 
-            for s in sorted_by_duration[:5]
-        ]
-
-        # 2. Most recent songs are last pushed on playback stack - reverse stack to get recent first
-        recent_songs = self.playback_history.stack[::-1]
-        snapshot['most_recently_played'] = [
-            {'title': s.title, 'artist': s.artist, 'duration': s.duration} 
-            for s in recent_songs[:5]
-        ]
-
-        # 3. Count songs grouped by rating from the rating BST
-        rating_counts = {}
-        def count_songs_by_rating(node):
-            if not node:
-                return
-            rating_counts[node.rating] = len(node.songs)
-            count_songs_by_rating(node.left)
-            count_songs_by_rating(node.right)
-
-        count_songs_by_rating(self.rating_tree.root)
-        snapshot['song_count_by_rating'] = rating_counts
-
-        return snapshot
+        snapshot = super().export_snapshot()
+
+        def brief(s):
+            return {'title': s.title, 'artist': s.artist, 'duration': s.duration}
+
+        return {
+            'top_5_longest_songs': [brief(s) for s in snapshot['top_5_longest_songs']],
+            'most_recently_played': [brief(s) for s in snapshot['most_recently_played_songs']],
+            'song_count_by_rating': {
+                rating: count for rating, count in snapshot['song_count_by_rating'].items() if count
+            }
+        }
@@ -16,6 +16,18 @@ class Song:
         self.duration = duration  # stored as seconds for easier computation
         self.genre = genre  # optional, can be None if unknown
 
+    def to_dict(self):
+        """
+        Returns the song as a plain dictionary, ready for JSON serialization.
+        """
+        return {
+            'song_id': self.song_id,
+            'title': self.title,
+            'artist': self.artist,
+            'duration': self.duration,
+            'genre': self.genre
+        }
+
     def __str__(self):
         """
         Returns a human-readable string representation of the song,
@@ -9,6 +9,8 @@ class SongLookup:
         self.id_map = {}
         # Dictionary mapping lowercase song title to list of Song objects for O(1) title-based lookup
         self.title_map = {}
+        # Incremented on every add or remove so readers can detect changes
+        self.version = 0
 
     def add_song(self, song):
         """
@@ -20,6 +22,24 @@ class SongLookup:
         if title_key not in self.title_map:
             self.title_map[title_key] = []
         self.title_map[title_key].append(song)
+        self.version += 1
+
+    def add_songs(self, songs):
+        """
+        Add many songs to the lookup maps in one call (bulk loading).
+        Time Complexity: O(k), k = number of songs added
+        """
+        id_map = self.id_map
+        title_map = self.title_map
+        for song in songs:
+            id_map[song.song_id] = song
+            title_key = song.title.lower()
+            bucket = title_map.get(title_key)
+            if bucket is None:
+                title_map[title_key] = [song]
+            else:
+                bucket.append(song)
+        self.version += 1
 
     def remove_song(self, song):
         """
@@ -27,6 +47,7 @@ class SongLookup:
         Removes by ID and updates title mapping accordingly.
         """
         self.id_map.pop(song.song_id, None)  # Remove from ID map if exists
+        self.version += 1
         title_key = song.title.lower()
         if title_key in self.title_map:
             # Remove song from the list of songs under that title
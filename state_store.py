@@ -0,0 +1,322 @@
+import contextlib
+import gc
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from playlist_engine import PlaylistEngine
+from playback_history import PlaybackHistory
+from rating_bst import RatingBST
+from song import Song
+from song_lookup import SongLookup
+
+# File layout (all integers little-endian):
+#   header | string index | string data | song records | playlist | pins | history | ratings
+#
+# - string index: one (offset, length) pair per distinct string, pointing into string data
+# - song records: fixed-width, sorted by song_id so a single song can be found with a binary search
+# - playlist / history: record numbers (uint32) in order
+# - pins: (song_id, position) pairs
+# - ratings: (record number, rating) pairs in rating-bucket order
+
+MAGIC = b"PWS1"
+FORMAT_VERSION = 1
+FLAG_REVERSED = 1
+NO_STRING = 0xFFFFFFFF  # String reference used for a missing genre
+UNRATED = 0
+
+HEADER = struct.Struct("<4sHHQ6I7Q")
+STRING_ENTRY = struct.Struct("<II")      # offset, length
+SONG_RECORD = struct.Struct("<qIIIiB3x")  # song_id, title, artist, genre, duration (signed), rating
+PIN_ENTRY = struct.Struct("<qI")          # song_id, position
+RATING_ENTRY = struct.Struct("<IB")       # record number, rating
+
+
+def save_state(path, playlist, history, rating_tree, lookup=None, checkpoint_seq=0):
+    """
+    Save the whole PlayWise state to a compact binary file.
+    The file is written next to the target and renamed into place, so a crash
+    never leaves a half-written state behind.
+
+    Args:
+        path (str): Destination file.
+        playlist (PlaylistEngine): Playlist order, pins and reversed flag are saved.
+        history (PlaybackHistory): Playback stack, oldest first.
+        rating_tree (RatingBST): Rating buckets.
+        lookup (SongLookup, optional): Extra catalog songs that are not in any of the above.
+        checkpoint_seq (int): Journal sequence number this state is consistent with.
+
+    Time Complexity: O(n log n), n = number of distinct songs (records are sorted by ID)
+    """
+    playlist_songs = playlist.to_list()
+    rating_pairs = []  # (song, rating) in bucket order
+
+    def collect_ratings(node):
+        if node is None:
+            return
+        collect_ratings(node.left)
+        for song in node.songs:
+            rating_pairs.append((song, node.rating))
+        collect_ratings(node.right)
+
+    collect_ratings(rating_tree.root)
+
+    # Catalog: every distinct song ID referenced anywhere, first occurrence wins
+    catalog = {}
+    sources = [playlist_songs, history.stack, (song for song, _ in rating_pairs)]
+    if lookup is not None:
+        sources.append(lookup.id_map.values())
+    for source in sources:
+        for song in source:
+            if song.song_id not in catalog:
+                catalog[song.song_id] = song
+    songs = [catalog[song_id] for song_id in sorted(catalog)]
+    record_of = {song.song_id: i for i, song in enumerate(songs)}
+    rating_of = {song.song_id: rating for song, rating in rating_pairs}
+
+    # String table: each distinct title/artist/genre is stored once
+    titles = [song.title for song in songs]
+    artists = [song.artist for song in songs]
+    genres = [song.genre for song in songs]
+    unique = dict.fromkeys(titles)
+    unique.update(dict.fromkeys(artists))
+    unique.update(dict.fromkeys(genres))
+    unique.pop(None, None)
+    string_ids = {value: ref for ref, value in enumerate(unique)}
+    string_ids[None] = NO_STRING
+    strings = [value.encode("utf-8") for value in unique]
+    ref = string_ids.__getitem__
+
+    song_records = bytearray(SONG_RECORD.size * len(songs))
+    pack_into = SONG_RECORD.pack_into
+    record_size = SONG_RECORD.size
+    for i, (song, title, artist, genre) in enumerate(zip(songs, map(ref, titles), map(ref, artists), map(ref, genres))):
+        pack_into(song_records, i * record_size, song.song_id, title, artist, genre,
+                  song.duration, rating_of.get(song.song_id, UNRATED))
+
+    string_index = bytearray(STRING_ENTRY.size * len(strings))
+    offset = 0
+    for i, data in enumerate(strings):
+        STRING_ENTRY.pack_into(string_index, i * STRING_ENTRY.size, offset, len(data))
+        offset += len(data)
+    string_data = b"".join(strings)
+
+    playlist_records = _uint32_bytes(record_of[song.song_id] for song in playlist_songs)
+    history_records = _uint32_bytes(record_of[song.song_id] for song in history.stack)
+    pins = b"".join(PIN_ENTRY.pack(song_id, position)
+                    for song_id, position in playlist.pinned_songs.items())
+    ratings = b"".join(RATING_ENTRY.pack(record_of[song.song_id], rating)
+                       for song, rating in rating_pairs)
+
+    sections = [string_index, string_data, song_records, playlist_records, pins, history_records, ratings]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_REVERSED if playlist.reversed else 0,
+                         checkpoint_seq, len(strings), len(songs), len(playlist_songs),
+                         len(playlist.pinned_songs), len(history.stack), len(rating_pairs),
+                         *offsets)
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for section in sections:
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        with contextlib.suppress(OSError):  # The existing state file is left as it was
+            os.remove(tmp_path)
+        raise
+
+
+def load_state(path):
+    """
+    Open a saved state through mmap. Only the header is parsed up front;
+    songs and strings are decoded on demand.
+
+    Returns:
+        StateFile: Lazy view over the file. Call restore() to rebuild live objects.
+
+    Time Complexity: O(1)
+    """
+    return StateFile(path)
+
+
+def _uint32_bytes(values):
+    """
+    Pack an iterable of ints as little-endian uint32 values.
+    """
+    data = array("I", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+class StateFile:
+    """
+    Read-only, memory-mapped view over a file written by save_state().
+    Songs are decoded lazily from fixed-width records, so opening a
+    million-song library only costs the mmap call and the header parse.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, flags, self.checkpoint_seq, self.string_count, self.song_count,
+         self.playlist_length, self.pin_count, self.history_length, self.rating_count,
+         self._strings_index_off, self._strings_data_off, self._songs_off, self._playlist_off,
+         self._pins_off, self._history_off, self._ratings_off) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a PlayWise state file (version {FORMAT_VERSION}).")
+        self.reversed = bool(flags & FLAG_REVERSED)
+
+    def close(self):
+        """
+        Release the memory map and the underlying file.
+        """
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Lazy access ---
+
+    def string(self, ref):
+        """
+        Decode one entry of the string table.
+        Time Complexity: O(length of the string)
+        """
+        if ref == NO_STRING:
+            return None
+        offset, length = STRING_ENTRY.unpack_from(self._mm, self._strings_index_off + ref * STRING_ENTRY.size)
+        start = self._strings_data_off + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def song_at(self, record):
+        """
+        Build the Song stored in a given record number.
+        Time Complexity: O(1)
+        """
+        song_id, title, artist, genre, duration, _ = self._record(record)
+        return Song(song_id, self.string(title), self.string(artist), duration, self.string(genre))
+
+    def rating_at(self, record):
+        """
+        Rating stored for a record, or None when the song is unrated.
+        """
+        rating = self._record(record)[5]
+        return rating if rating != UNRATED else None
+
+    def find_song(self, song_id):
+        """
+        Binary search the ID-sorted song records without loading them.
+        Returns the Song or None.
+        Time Complexity: O(log n)
+        """
+        record = bisect_left(_RecordIds(self), song_id)
+        if record < self.song_count and self._record(record)[0] == song_id:
+            return self.song_at(record)
+        return None
+
+    def iter_playlist(self):
+        """
+        Lazily yield the playlist songs in to_list() order (head to tail).
+        """
+        for record in self._uint32_section(self._playlist_off, self.playlist_length):
+            yield self.song_at(record)
+
+    def _record(self, record):
+        return SONG_RECORD.unpack_from(self._mm, self._songs_off + record * SONG_RECORD.size)
+
+    def _uint32_section(self, offset, count):
+        data = array("I")
+        data.frombytes(self._mm[offset:offset + 4 * count])
+        if sys.byteorder != "little":
+            data.byteswap()
+        return data
+
+    # --- Full restore ---
+
+    def restore(self):
+        """
+        Rebuild live objects from the file. Every record becomes exactly one
+        Song object shared by the playlist, history, rating tree and lookup.
+
+        Returns:
+            tuple: (PlaylistEngine, PlaybackHistory, RatingBST, SongLookup)
+
+        Time Complexity: O(n)
+        """
+        # Millions of new objects would otherwise trigger repeated full GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._restore()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _restore(self):
+        mm = self._mm
+        strings = []
+        index_end = self._strings_index_off + self.string_count * STRING_ENTRY.size
+        data_off = self._strings_data_off
+        for offset, length in STRING_ENTRY.iter_unpack(mm[self._strings_index_off:index_end]):
+            strings.append(mm[data_off + offset:data_off + offset + length].decode("utf-8"))
+        strings_get = strings.__getitem__
+
+        songs = []
+        songs_end = self._songs_off + self.song_count * SONG_RECORD.size
+        for song_id, title, artist, genre, duration, _ in SONG_RECORD.iter_unpack(mm[self._songs_off:songs_end]):
+            songs.append(Song(song_id, strings_get(title), strings_get(artist), duration,
+                              strings_get(genre) if genre != NO_STRING else None))
+
+        playlist = PlaylistEngine()
+        playlist.from_list(songs[record] for record in self._uint32_section(self._playlist_off, self.playlist_length))
+        pins_end = self._pins_off + self.pin_count * PIN_ENTRY.size
+        playlist.pinned_songs = {song_id: position for song_id, position
+                                 in PIN_ENTRY.iter_unpack(mm[self._pins_off:pins_end])}
+        playlist.reversed = self.reversed
+
+        history = PlaybackHistory()
+        history.stack = [songs[record] for record in self._uint32_section(self._history_off, self.history_length)]
+
+        rating_tree = RatingBST()
+        ratings_end = self._ratings_off + self.rating_count * RATING_ENTRY.size
+        for record, rating in RATING_ENTRY.iter_unpack(mm[self._ratings_off:ratings_end]):
+            rating_tree.insert_song(songs[record], rating)
+
+        lookup = SongLookup()
+        for song in songs:
+            lookup.add_song(song)
+
+        return playlist, history, rating_tree, lookup
+
+
+class _RecordIds:
+    """
+    Sequence adapter exposing the song_id of each record, so bisect can search the mmap directly.
+    """
+
+    def __init__(self, state):
+        self._state = state
+
+    def __len__(self):
+        return self._state.song_count
+
+    def __getitem__(self, record):
+        return self._state._record(record)[0]
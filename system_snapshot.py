@@ -1,4 +1,30 @@
+import heapq
+import json
+import secrets
+
+import instrumentation
+
 class SystemSnapshot:
+    """
+    Aggregates and exports a snapshot summary of the current system state:
+    - Top 5 longest songs in the playlist
+    - Most recently played songs from playback history
+    - Song counts by rating
+
+    Snapshots can be returned as a dictionary or streamed incrementally as
+    JSON / NDJSON to a file object. Every export carries a version token;
+    passing it back as 'since' produces a delta containing only the sections
+    whose source component changed in the meantime. Tokens also carry a random
+    epoch chosen per snapshot instance, so a token issued before a restart or a
+    state restore (when the version counters start again from zero) never
+    matches and produces a full snapshot instead of a wrong delta.
+
+    While instrumentation is enabled, every export also carries the
+    per-operation metrics (they change on every call, so deltas always include them).
+    """
+
+    TOP_N = 5  # Number of songs reported in the "longest" and "recently played" sections
+
     def __init__(self, playlist_engine, playback_history, rating_bst):
         """
         Initialize the SystemSnapshot module with references to the main components.
@@ -11,6 +37,7 @@ class SystemSnapshot:
         self.playlist_engine = playlist_engine
         self.playback_history = playback_history
         self.rating_bst = rating_bst
+        self.epoch = secrets.token_hex(8)  # Distinguishes this instance's tokens from older ones
 
     def export_snapshot(self):
         """
@@ -25,23 +52,153 @@ class SystemSnapshot:
                 'top_5_longest_songs': List of Song objects (top 5 by duration).
                 'most_recently_played_songs': List of Song objects (last 5 played).
                 'song_count_by_rating': Dict mapping rating (1-5) to count of songs.
+                'operation_metrics': Per-operation metrics, only while instrumentation is enabled.
         """
-        # Fetch all songs currently in the playlist
-        songs = self.playlist_engine.to_list()
+        snapshot = {
+            "top_5_longest_songs": self._top_longest_songs(),
+            "most_recently_played_songs": self._most_recently_played(),
+            "song_count_by_rating": self.rating_bst.count_songs_by_rating()
+        }
+        if instrumentation.is_enabled():
+            snapshot["operation_metrics"] = instrumentation.METRICS.to_dict()
+        return snapshot
 
-        # Sort songs by duration descending to find the longest ones
-        top_5_longest_songs = sorted(songs, key=lambda s: s.duration, reverse=True)[:5]
+    def version_token(self):
+        """
+        Returns an opaque token identifying the current state of all components.
+        Time Complexity: O(1)
+        """
+        return (f"{self.epoch}."
+                f"{self.playlist_engine.version}."
+                f"{self.playback_history.version}."
+                f"{self.rating_bst.version}")
 
-        # Get last 5 played songs from playback history stack (newest first)
-        recent_played = self.playback_history.stack[-5:]
-        most_recently_played_songs = recent_played[::-1]
+    def export_delta(self, since=None):
+        """
+        Generate a snapshot containing only the sections that changed since the
+        given version token. A missing or unreadable token, or one issued by another
+        snapshot instance (another epoch), yields a full snapshot.
 
-        # Get count of songs for each rating from the rating BST
-        song_count_by_rating = self.rating_bst.count_songs_by_rating()
+        Returns:
+            dict: {'version': token, 'delta': bool, <changed sections>...}
+                  Songs are serialized as dictionaries.
+        """
+        snapshot = {'version': self.version_token(), 'delta': self._parse_token(since) is not None}
+        for name, kind, payload in self._sections(since, include_playlist=False):
+            if kind == 'songs':
+                snapshot[name] = [song.to_dict() for song in payload]
+            else:
+                snapshot[name] = payload
+        return snapshot
 
-        # Return snapshot data as a dictionary
-        return {
-            "top_5_longest_songs": top_5_longest_songs,
-            "most_recently_played_songs": most_recently_played_songs,
-            "song_count_by_rating": song_count_by_rating
-        }
+    def stream_json(self, fp, since=None, include_playlist=False):
+        """
+        Write the snapshot (or a delta, when 'since' is given) to a text file object
+        as a single JSON document, one song at a time, without building it in memory.
+        With include_playlist=True the whole playlist is streamed in display order.
+        Time Complexity: O(n) with include_playlist, O(n log 5) otherwise.
+        """
+        fp.write('{"version": %s, "delta": %s' % (
+            json.dumps(self.version_token()),
+            json.dumps(self._parse_token(since) is not None)))
+        for name, kind, payload in self._sections(since, include_playlist):
+            fp.write(', %s: ' % json.dumps(name))
+            if kind == 'songs':
+                fp.write('[')
+                first = True
+                for song in payload:
+                    if not first:
+                        fp.write(', ')
+                    fp.write(json.dumps(song.to_dict()))
+                    first = False
+                fp.write(']')
+            else:
+                fp.write(json.dumps(payload))
+        fp.write('}\n')
+
+    def stream_ndjson(self, fp, since=None, include_playlist=False):
+        """
+        Write the snapshot (or a delta) to a text file object as newline-delimited JSON.
+        The first line is a header with the version token; every following line is
+        one record: {"section": ..., "song": {...}}, {"section": ..., "rating": r, "count": c}
+        or {"section": ..., "operation": name, ...stats}.
+        Time Complexity: O(n) with include_playlist, O(n log 5) otherwise.
+        """
+        header = {'type': 'header', 'version': self.version_token(),
+                  'delta': self._parse_token(since) is not None}
+        fp.write(json.dumps(header) + '\n')
+        for name, kind, payload in self._sections(since, include_playlist):
+            if kind == 'songs':
+                for song in payload:
+                    fp.write(json.dumps({'section': name, 'song': song.to_dict()}) + '\n')
+            elif kind == 'metrics':
+                for operation, stats in payload.items():
+                    fp.write(json.dumps({'section': name, 'operation': operation, **stats}) + '\n')
+            else:
+                for rating, count in payload.items():
+                    fp.write(json.dumps({'section': name, 'rating': rating, 'count': count}) + '\n')
+
+    def _sections(self, since, include_playlist):
+        """
+        Yield (section_name, kind, payload) for every section that changed since
+        the given token. 'songs' payloads are lazy iterables of Song objects.
+        """
+        previous = self._parse_token(since)
+        playlist_changed = previous is None or previous[0] != self.playlist_engine.version
+        history_changed = previous is None or previous[1] != self.playback_history.version
+        ratings_changed = previous is None or previous[2] != self.rating_bst.version
+
+        if playlist_changed:
+            yield 'top_5_longest_songs', 'songs', self._top_longest_songs()
+        if history_changed:
+            yield 'most_recently_played_songs', 'songs', self._most_recently_played()
+        if ratings_changed:
+            yield 'song_count_by_rating', 'counts', self.rating_bst.count_songs_by_rating()
+        if instrumentation.is_enabled():
+            yield 'operation_metrics', 'metrics', instrumentation.METRICS.to_dict()
+        if include_playlist and playlist_changed:
+            yield 'playlist', 'songs', self._iter_playlist()
+
+    def _top_longest_songs(self):
+        """
+        Longest songs in the playlist, longest first, using a bounded heap
+        instead of sorting the whole playlist.
+        Time Complexity: O(n log 5)
+        """
+        return heapq.nlargest(self.TOP_N, self._iter_playlist(display_order=False),
+                              key=lambda s: s.duration)
+
+    def _most_recently_played(self):
+        """
+        Last played songs, newest first. Only the tail of the stack is touched.
+        Time Complexity: O(5)
+        """
+        return self.playback_history.stack[-self.TOP_N:][::-1]
+
+    def _iter_playlist(self, display_order=True):
+        """
+        Walk the playlist nodes lazily. In display order the reversed flag is respected;
+        otherwise songs come in to_list() order (head to tail).
+        """
+        playlist = self.playlist_engine
+        backwards = display_order and playlist.reversed
+        current = playlist.tail if backwards else playlist.head
+        while current:
+            yield current.song
+            current = current.prev if backwards else current.next
+
+    def _parse_token(self, token):
+        """
+        Parse a version token into (playlist, history, rating) versions, or None
+        when it is unreadable or belongs to another epoch.
+        """
+        if not token:
+            return None
+        try:
+            epoch, playlist_v, history_v, rating_v = token.split('.')
+            versions = int(playlist_v), int(history_v), int(rating_v)
+        except (ValueError, AttributeError):
+            return None
+        if epoch != self.epoch:
+            return None
+        return versions